@@ -1,114 +1,309 @@
-import streamlit as st
+import time
+from functools import partial
+
 import pandas as pd
-import plotly.express as px
-from pyproj import Transformer
+import streamlit as st
+
+from data_cube import ConsentCube
+from data_loader import CSV_PATH, cache_stats, load_entry, refresh_delta
+from expiry_index import ExpiryIndex
+from export import EXPORT_FORMATS, export_selection
+from figure_cache import figures
+from filter_index import FilterIndex, select_rows, take_rows
+from instrumentation import process_recorder, session_profiler
+from map_binning import MAP_MODES, consent_map
+from records_table import PAGE_SIZES, SortOrder, page_count, page_slice
+from reprojection import wgs84_to_nztm
+from schema import observed_counts, observed_values
+from spatial_index import SpatialIndex
+from startup import breakdown, mark, start_warmup
+from text_index import TextIndex
 
 # --- CONFIG ---
 st.set_page_config(layout="wide")
 st.title("🇳🇿 Air Discharge Consents Dashboard (New Zealand)")
 
-# --- LOAD DATA ---
-csv_path = "Cleaned_Data.csv"  
-df = pd.read_csv(csv_path)
+# Shared structures built on the table (see LOAD DATA below).
+DERIVED = {
+    "filter_index": FilterIndex,
+    "cube": ConsentCube,
+    "spatial_index": SpatialIndex,
+    "expiry_index": ExpiryIndex,
+    "text_index": TextIndex,
+}
+# On the first run in a process, import plotly, open the CRS database and
+# load the data on a background thread; the loads below share its work.
+first_run = start_warmup(CSV_PATH, DERIVED)
+if first_run:
+    mark("first paint")
 
-# --- CLEAN COLUMN NAMES ---
-df.columns = df.columns.str.strip()
+# Stage timings; a no-op unless DASHBOARD_PROFILE is set (see instrumentation.py)
+profiler = session_profiler(st.session_state)
+rerun_start = time.perf_counter()
 
-# --- TRANSFORM COORDINATES ---
-if {'X', 'Y'}.issubset(df.columns):
-    transformer = Transformer.from_crs("EPSG:2193", "EPSG:4326", always_xy=True)
-    coords = df[['X', 'Y']].dropna().values
-    transformed = [transformer.transform(x, y) for x, y in coords]
+# New or changed consents (same columns as the CSV) merged in without a reload.
+DELTA_PATH = "Cleaned_Data_updates.csv"
 
-    df['Longitude'] = None
-    df['Latitude'] = None
-    df.loc[df[['X', 'Y']].dropna().index, ['Longitude', 'Latitude']] = transformed
-else:
-    df['Longitude'], df['Latitude'] = None, None
+# Columns copied out of the shared table for the map; nothing else is copied.
+MAP_COLUMNS = ['Latitude', 'Longitude', 'FeatureType', 'GIS_TerritorialAuthority']
+# Columns and rows per page of the upcoming-expiries table.
+EXPIRY_COLUMNS = ['ConsentNo', 'FeatureType', 'GIS_TerritorialAuthority', 'Location', 'toDate']
+EXPIRY_PAGE_SIZE = 25
+# Columns shown in the records table until the user picks others.
+RECORD_COLUMNS = ['ConsentNo', 'ConsentStatus', 'FeatureType', 'GIS_TerritorialAuthority', 'Location',
+                  'fmDate', 'toDate']
 
-# --- PARSE DATES ---
-if 'fmDate' in df.columns:
-    df['fmDate'] = pd.to_datetime(df['fmDate'], errors='coerce')
-    df['StartYear'] = df['fmDate'].dt.year
-else:
-    df['StartYear'] = None
+# --- LOAD DATA ---
+# Loaded once per process and shared by all sessions; only reloaded when the
+# CSV changes on disk. Column cleanup, reprojection and date parsing happen
+# inside the loader, which prefers the prebuilt binary snapshot when fresh.
+with profiler.span("load"):
+    refresh_delta(DELTA_PATH, CSV_PATH)
+    # Everything below comes from this one entry, so a delta merged by another
+    # session mid-rerun never pairs this table with another table's indexes.
+    entry = load_entry(CSV_PATH)
+    df = entry.df
+    # Bitmap index over the filter columns, built once per load and shared.
+    index = entry.derived("filter_index", DERIVED["filter_index"])
+    # Pre-aggregated counts that every chart below is rolled up from.
+    cube = entry.derived("cube", DERIVED["cube"])
+    # Grid index over NZTM X/Y for the map's radius search.
+    spatial = entry.derived("spatial_index", DERIVED["spatial_index"])
+    # Row positions sorted by toDate for expiry windows.
+    expiries = entry.derived("expiry_index", DERIVED["expiry_index"])
+    # Word and consent number index behind the search box.
+    texts = entry.derived("text_index", DERIVED["text_index"])
+    # Keys the figure cache, so a reloaded table never serves stale charts.
+    version = entry.version
 
 # --- SIDEBAR FILTERS ---
 st.sidebar.header("🔎 Filters")
 
-status_options = ["All"] + sorted(df['ConsentStatus'].dropna().unique().tolist())
+status_options = ["All"] + observed_values(df['ConsentStatus'])
 selected_status = st.sidebar.selectbox("Consent Status", status_options)
 
 min_year, max_year = int(df['StartYear'].min()), int(df['StartYear'].max())
 year_range = st.sidebar.slider("Consent Start Year Range", min_year, max_year, (min_year, max_year))
 
+search_query = st.sidebar.text_input("Search Site, Activity or Consent No.",
+                                     placeholder="e.g. HINDS, airport, CRC 9619").strip()
+
 # --- FILTER DATA ---
-filtered_df = df.copy()
-if selected_status != "All":
-    filtered_df = filtered_df[filtered_df['ConsentStatus'] == selected_status]
+sidebar_isin = {} if selected_status == "All" else {'ConsentStatus': [selected_status]}
+sidebar_ranges = {'StartYear': year_range}
+with profiler.span("filter"):
+    filter_bits = index.query_bits(isin=sidebar_isin, ranges=sidebar_ranges)
+    if search_query:
+        filter_bits &= index.rows_bits(texts.search(search_query))
+if search_query:
+    st.sidebar.caption(f"{index.count(filter_bits):,} consents match the search and filters")
+# Everything the sidebar contributes to a chart's cache key.
+filter_key = (version, selected_status, tuple(year_range), search_query)
+
+
+def selection_counts(column):
+    """Counts by ``column`` for the sidebar selection.
+
+    Rolled up from the cube, unless a search narrows the selection to rows
+    the cube can't tell apart; then counted from just those rows.
+    """
+    if not search_query:
+        return cube.rollup(column, sidebar_isin, sidebar_ranges)
+    return observed_counts(select_rows(df, index.to_mask(filter_bits), [column])[column])
 
-filtered_df = filtered_df[
-    (filtered_df['StartYear'] >= year_range[0]) &
-    (filtered_df['StartYear'] <= year_range[1])
-]
+
+# --- EXPORT ---
+with st.sidebar.expander("⬇️ Export Filtered Consents"):
+    export_format = st.selectbox("Format", list(EXPORT_FORMATS))
+    extension, mime = EXPORT_FORMATS[export_format]
+    # Written in chunks to a temporary file only when the button is clicked.
+    st.download_button(f"Download {index.count(filter_bits):,} consents",
+                       partial(export_selection, df, index.to_mask(filter_bits), export_format),
+                       file_name=f"consents.{extension}", mime=mime, on_click="ignore")
 
 # --- SUMMARY METRICS ---
 st.subheader("📊 Summary")
 col1, col2, col3 = st.columns(3)
-col1.metric("Total Consents", len(filtered_df))
-col2.metric("Active Consents", df[df['ConsentStatus'] == 'Issued - Active'].shape[0])
+col1.metric("Total Consents", index.count(filter_bits) if search_query else cube.total(sidebar_isin, sidebar_ranges))
+col2.metric("Active Consents", index.count(index.query_bits(isin={'ConsentStatus': ['Issued - Active']})))
 col3.metric("Regions Covered", df['GIS_TerritorialAuthority'].nunique())
 
 # --- ACTIVITY TYPE CHART ---
 st.subheader("⚙️ Top Discharge Activities")
 top_n = st.slider("Top N Activity Types", 5, 20, 10)
-activity_counts = filtered_df['FeatureType'].value_counts().nlargest(top_n).reset_index()
-activity_counts.columns = ['Activity Type', 'Count']
-fig1 = px.bar(activity_counts, x='Count', y='Activity Type', orientation='h', title=f"Top {top_n} Discharge Activities")
-st.plotly_chart(fig1, use_container_width=True)
+
+
+def build_activity_chart():
+    # plotly is imported on first use (usually already by the warm-up thread).
+    import plotly.express as px
+
+    activity_counts = selection_counts('FeatureType').nlargest(top_n).reset_index()
+    activity_counts.columns = ['Activity Type', 'Count']
+    return px.bar(activity_counts, x='Count', y='Activity Type', orientation='h', title=f"Top {top_n} Discharge Activities")
+
+
+with profiler.span("chart:activity"):
+    fig1 = figures.get_or_build("activity", filter_key + (top_n,), build_activity_chart)
+    st.plotly_chart(fig1, use_container_width=True)
 
 # --- REGIONAL DISTRIBUTION ---
 st.subheader("🌐 Regional Distribution")
-region_counts = filtered_df['GIS_TerritorialAuthority'].value_counts().nlargest(10).reset_index()
-region_counts.columns = ['Region', 'Count']
-fig2 = px.bar(region_counts, x='Region', y='Count', title="Top 10 Regions by Consent Volume")
-fig2.update_layout(xaxis_tickangle=45)
-st.plotly_chart(fig2, use_container_width=True)
+
+
+def build_region_chart():
+    import plotly.express as px
+
+    region_counts = selection_counts('GIS_TerritorialAuthority').nlargest(10).reset_index()
+    region_counts.columns = ['Region', 'Count']
+    fig = px.bar(region_counts, x='Region', y='Count', title="Top 10 Regions by Consent Volume")
+    fig.update_layout(xaxis_tickangle=45)
+    return fig
+
+
+with profiler.span("chart:regions"):
+    fig2 = figures.get_or_build("regions", filter_key, build_region_chart)
+    st.plotly_chart(fig2, use_container_width=True)
 
 # --- TREND OVER TIME ---
 st.subheader("📈 Consents Issued Over Time")
-trend_df = filtered_df.dropna(subset=['StartYear'])
-fig3 = px.histogram(trend_df, x='StartYear', title='Consent Frequency by Year')
-st.plotly_chart(fig3, use_container_width=True)
+
+
+def build_trend_chart():
+    import plotly.express as px
+
+    trend_df = selection_counts('StartYear').sort_index().reset_index()
+    trend_df.columns = ['StartYear', 'count']
+    # One bar per year with no gaps: the yearly histogram, from counts not rows.
+    fig = px.bar(trend_df, x='StartYear', y='count', title='Consent Frequency by Year')
+    fig.update_layout(bargap=0)
+    return fig
+
+
+with profiler.span("chart:trend"):
+    fig3 = figures.get_or_build("trend", filter_key, build_trend_chart)
+    st.plotly_chart(fig3, use_container_width=True)
 
 # --- MAP VISUALISATION ---
 st.subheader("🗺️ Consent Locations Map")
 
-# Only use filtered_df rows with coordinates
-map_df = filtered_df.dropna(subset=['Latitude', 'Longitude'])
+# Only use filtered rows with coordinates
+map_bits = filter_bits & index.query_bits(notna=['Latitude', 'Longitude'])
 
 # FeatureType multiselect for map filtering
-feature_options = sorted(map_df['FeatureType'].dropna().unique())
+feature_options = index.present_values('FeatureType', map_bits)
 selected_features = st.multiselect(
     "Select Feature Types to Display on Map:",
     options=feature_options,
     default=feature_options
 )
 
-map_filtered_df = map_df[map_df['FeatureType'].isin(selected_features)]
-
-if not map_filtered_df.empty:
-    fig_map = px.scatter_mapbox(
-        map_filtered_df,
-        lat='Latitude',
-        lon='Longitude',
-        color='FeatureType',
-        hover_name='GIS_TerritorialAuthority',
-        mapbox_style="carto-positron",
-        zoom=5,
-        height=600,
-        title="Discharge Locations by Activity Type"
-    )
-    st.plotly_chart(fig_map, use_container_width=True)
+# Radius search: NZTM is metric, so the grid index answers it on X/Y directly
+with st.expander("📍 Radius Search"):
+    radius_on = st.checkbox("Only show consents near a point")
+    radius_col1, radius_col2, radius_col3 = st.columns(3)
+    centre_lat = radius_col1.number_input("Centre Latitude", -48.0, -34.0, -43.5321, format="%.4f")
+    centre_lon = radius_col2.number_input("Centre Longitude", 166.0, 179.0, 172.6362, format="%.4f")
+    radius_km = radius_col3.slider("Radius (km)", 1, 200, 25)
+
+# Sidebar, coordinate, FeatureType and radius predicates are one combined
+# bitset; only the columns the map draws are copied out of the shared table.
+map_bits &= index.isin_bits('FeatureType', selected_features)
+map_center = None
+radius_key = None
+if radius_on:
+    centre_x, centre_y = wgs84_to_nztm(centre_lon, centre_lat)
+    near_rows, _ = spatial.within(centre_x, centre_y, radius_km * 1000)
+    map_bits &= index.rows_bits(near_rows)
+    map_center = {'lat': centre_lat, 'lon': centre_lon}
+    radius_key = (centre_lat, centre_lon, radius_km)
+map_count = index.count(map_bits)
+
+# Large selections are clustered server-side so the figure stays small.
+map_col1, map_col2 = st.columns(2)
+map_mode = map_col1.radio("Map Detail", MAP_MODES, horizontal=True)
+map_zoom = map_col2.slider("Map Zoom Level", 4, 14, 5)
+
+if radius_on:
+    st.caption(f"{map_count:,} consents within {radius_km} km of ({centre_lat:.4f}, {centre_lon:.4f})")
+
+
+def build_map():
+    map_filtered_df = select_rows(df, index.to_mask(map_bits), MAP_COLUMNS)
+    return consent_map(map_filtered_df, zoom=map_zoom, mode=map_mode, center=map_center)
+
+
+if map_count:
+    map_key = filter_key + (tuple(selected_features), radius_key, map_mode, map_zoom)
+    with profiler.span("chart:map"):
+        fig_map = figures.get_or_build("map", map_key, build_map)
+        st.plotly_chart(fig_map, use_container_width=True)
 else:
     st.info("No map data to display for the selected filters.")
+
+# --- UPCOMING EXPIRIES ---
+st.subheader("⏳ Upcoming Expiries")
+expiry_col1, expiry_col2 = st.columns(2)
+horizon_years = expiry_col1.slider("Expiry Horizon (years)", 1, 30, 5)
+
+today = pd.Timestamp.today().normalize()
+with profiler.span("expiries"):
+    expiring = expiries.window(today, today + pd.DateOffset(years=horizon_years))
+    # Apply the sidebar filters without losing the soonest-first order.
+    expiring = expiring[index.to_mask(filter_bits)[expiring]]
+
+expiry_pages = page_count(len(expiring), EXPIRY_PAGE_SIZE)
+expiry_page = expiry_col2.number_input(f"Page (of {expiry_pages})", 1, expiry_pages, 1)
+st.caption(f"{len(expiring):,} consents expire in the next {horizon_years} years")
+# Only the visible page is copied out and sent to the browser.
+st.dataframe(take_rows(df, page_slice(expiring, expiry_page, EXPIRY_PAGE_SIZE), EXPIRY_COLUMNS), hide_index=True)
+
+# --- CONSENT RECORDS ---
+st.subheader("📋 Consent Records")
+record_columns = st.multiselect("Columns", list(df.columns), default=RECORD_COLUMNS)
+record_col1, record_col2, record_col3, record_col4 = st.columns(4)
+sort_column = record_col1.selectbox("Sort By", list(df.columns), index=list(df.columns).index('ConsentNo'))
+descending = record_col2.toggle("Descending")
+page_size = record_col3.selectbox("Rows Per Page", PAGE_SIZES)
+
+with profiler.span("records"):
+    # Sorted once per column and load; each rerun only filters the order.
+    order = entry.derived(f"sort_order:{sort_column}", lambda table: SortOrder(table, sort_column))
+    record_rows = order.rows(index.to_mask(filter_bits), descending)
+
+record_pages = page_count(len(record_rows), page_size)
+record_page = record_col4.number_input(f"Jump to Page (of {record_pages})", 1, record_pages, 1)
+st.caption(f"{len(record_rows):,} consents match the filters")
+if record_columns:
+    st.dataframe(take_rows(df, page_slice(record_rows, record_page, page_size), record_columns), hide_index=True)
+
+# --- DATA CACHE STATUS ---
+with st.sidebar.expander("Data cache"):
+    stats = cache_stats()
+    st.write(f"Hits: {stats['hits']} · Misses: {stats['misses']} · Reloads: {stats['reloads']}")
+    st.write(f"Deltas applied: {stats['delta_applies']} ({stats['delta_rows']} rows)")
+    # Counted when the CSV is parsed; a snapshot is stored already deduplicated.
+    st.write(f"Duplicate rows dropped: {stats['dropped_duplicates']}")
+
+# --- CHART BUILD TIMINGS ---
+with st.sidebar.expander("Chart build timings"):
+    usage = figures.usage()
+    st.write(f"Cached figures: {usage['entries']} ({usage['bytes'] / 2**20:.1f} MiB)")
+    st.dataframe([{"chart": chart, **timing} for chart, timing in figures.timings().items()])
+
+# --- STARTUP TIMINGS ---
+if first_run:
+    mark("first run complete")
+with st.sidebar.expander("🚀 Startup timings"):
+    st.caption("Offsets from when the dashboard modules were imported")
+    st.dataframe(breakdown(), hide_index=True)
+
+# --- PERFORMANCE DEBUG PANEL ---
+profiler.record("rerun", time.perf_counter() - rerun_start)
+if profiler.enabled:
+    with st.sidebar.expander("⏱️ Rerun timings (debug)"):
+        st.caption("This session")
+        st.dataframe(profiler.recorder.summary())
+        st.caption("All sessions in this process")
+        st.dataframe(process_recorder.summary())
+        st.download_button("Export spans (JSON lines)", profiler.export_jsonl(),
+                           file_name="dashboard_spans.jsonl", mime="application/jsonl")
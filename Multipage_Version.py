@@ -0,0 +1,235 @@
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+import plotly.express as px
+
+from data_cube import ConsentCube
+from data_loader import CSV_PATH, load_entry
+from derived_columns import page_frame
+from expiry_index import ExpiryIndex
+from figure_cache import figures
+from filter_index import FilterIndex, select_rows, take_rows
+from map_binning import consent_map
+from preprocess import prepare_base
+from records_table import page_count, page_slice
+from schema import observed_counts
+
+# --- CONFIG ---
+st.set_page_config(layout="wide")
+st.title("Air Discharge Consents Dashboard")
+
+# --- PAGE DECLARATIONS ---
+# The columns each page reads. The table is loaded without dates or
+# coordinates; those are derived the first time a page listing one of them is
+# opened and then shared by every session (see derived_columns.py).
+ACTIVITY_COLUMNS = ['ConsentStatus', 'FeatureType', 'RMASection', 'ConsentType']
+REGIONAL_COLUMNS = ['StartYear', 'ExpiryYear', 'GIS_TerritorialAuthority', 'GIS_Runanga', 'FeatureType',
+                    'Longitude', 'Latitude']
+TIME_COLUMNS = ['toDate', 'ConsentNo', 'FeatureType', 'GIS_TerritorialAuthority']
+MAP_COLUMNS = ['Latitude', 'Longitude', 'FeatureType', 'GIS_TerritorialAuthority']
+EXPIRY_COLUMNS = ['ConsentNo', 'FeatureType', 'GIS_TerritorialAuthority', 'toDate']
+EXPIRY_PAGE_SIZE = 25
+
+
+# Every column and aggregate below comes from this one entry, so a table
+# reloaded mid-rerun is never mixed with structures built on the old one.
+entry = load_entry(CSV_PATH, prepare_base)
+
+
+def page_aggregate(name, build):
+    """A page's aggregate, built from the cached table on first use."""
+    return entry.derived(f"page:{name}", build)
+
+
+def year_counts(column):
+    """Consents per year of ``column``, in year order."""
+    return page_frame([column], entry)[column].value_counts().sort_index()
+
+
+# Keys the figure cache, so a reloaded table never serves stale charts.
+version = entry.version
+
+page = st.sidebar.selectbox(
+    "Choose a page:",
+    ["Discharge Activity Overview", "Regional & Geographic Overview", "Time-Based Analysis"]
+)
+
+# ========== PAGE 1 ==========
+if page == "Discharge Activity Overview":
+    st.header("Discharge Activity Overview")
+    # Counts by every status/activity/section/type combination; no dates needed.
+    cube = page_aggregate("activity_cube",
+                          lambda df: ConsentCube(page_frame(ACTIVITY_COLUMNS, entry), ACTIVITY_COLUMNS))
+
+    # ConsentStatus filter
+    status_option = st.radio("Filter by Consent Status:", ["All", "Issued - Active", "Issued - Inactive"])
+    status_isin = {} if status_option == "All" else {'ConsentStatus': [status_option]}
+
+    # Top N FeatureType slider
+    top_n = st.slider("Number of Top Activity Types to Display:", min_value=3, max_value=20, value=10)
+
+    # Chart 1: Top Activity Types
+    st.subheader(f"Top {top_n} Discharge Activity Types")
+
+    def build_top_activities():
+        counts = cube.rollup('FeatureType', status_isin).nlargest(top_n).reset_index()
+        counts.columns = ['Activity Type', 'Count']
+        return px.bar(counts, x='Activity Type', y='Count', title=f"Top {top_n} Activity Types")
+
+    st.plotly_chart(figures.get_or_build("page1:activities", (version, status_option, top_n), build_top_activities),
+                    use_container_width=True)
+
+    # Chart 2: Consent Status by Activity
+    st.subheader("Consent Status Breakdown for Top Activities")
+
+    def build_status_breakdown():
+        top5 = cube.rollup('FeatureType', status_isin).nlargest(5).index.tolist()
+        grouped = cube.rollup(['FeatureType', 'ConsentStatus'], dict(status_isin, FeatureType=top5))
+        grouped = grouped.reset_index(name='Count')
+        return px.bar(grouped, x='FeatureType', y='Count', color='ConsentStatus', barmode='group')
+
+    st.plotly_chart(figures.get_or_build("page1:status", (version, status_option), build_status_breakdown),
+                    use_container_width=True)
+
+    # Chart 3: RMA Section Frequencies
+    st.subheader("RMA Legal Sections")
+
+    def build_rma_sections():
+        counts = cube.rollup('RMASection', status_isin).reset_index()
+        counts.columns = ['RMA Section', 'Count']
+        return px.bar(counts, x='RMA Section', y='Count', title="Legal Basis Frequency")
+
+    st.plotly_chart(figures.get_or_build("page1:rma", (version, status_option), build_rma_sections),
+                    use_container_width=True)
+
+    # Chart 4: Consent Type Distribution
+    st.subheader("Consent Type Distribution")
+
+    def build_consent_types():
+        counts = cube.rollup('ConsentType', status_isin).reset_index()
+        counts.columns = ['Consent Type', 'Count']
+        return px.pie(counts, names='Consent Type', values='Count', title='Consent Types')
+
+    st.plotly_chart(figures.get_or_build("page1:types", (version, status_option), build_consent_types),
+                    use_container_width=True)
+
+# ========== PAGE 2 ==========
+elif page == "Regional & Geographic Overview":
+    st.header("Regional & Geographic Overview")
+    frame = page_frame(REGIONAL_COLUMNS, entry)
+    # Bitmap index over this page's filter columns, built once per load.
+    index = page_aggregate("regional_index", lambda df: FilterIndex(page_frame(REGIONAL_COLUMNS, entry)))
+
+    # Filter: Year Range
+    st.sidebar.markdown("### Filter by Consent Start Year")
+    min_year, max_year = int(frame['StartYear'].min()), int(frame['StartYear'].max())
+    year_range = st.sidebar.slider("Select Year Range", min_value=min_year, max_value=max_year,
+                                   value=(min_year, max_year))
+    ranges = {'StartYear': year_range}
+
+    # Filter: Region
+    region_options = index.values('GIS_TerritorialAuthority')
+    selected_regions = st.sidebar.multiselect("Select Region(s)", region_options, default=region_options)
+
+    # Filter: Expiring Soon
+    expiring_soon = st.sidebar.checkbox("Show only consents expiring in the next 5 years")
+    if expiring_soon:
+        current_year = datetime.now().year
+        ranges['ExpiryYear'] = (current_year, current_year + 5)
+
+    bits = index.query_bits(isin={'GIS_TerritorialAuthority': selected_regions}, ranges=ranges)
+    filter_key = (version, tuple(year_range), tuple(selected_regions), expiring_soon)
+    df_time = select_rows(frame, index.to_mask(bits), ['GIS_TerritorialAuthority', 'StartYear', 'GIS_Runanga'])
+
+    # Chart 1: Consents by Region
+    st.subheader("Consents by Territorial Authority")
+
+    def build_regions():
+        counts = observed_counts(df_time['GIS_TerritorialAuthority']).reset_index()
+        counts.columns = ['Region', 'Count']
+        fig = px.bar(counts, x='Region', y='Count', title="Consents per Region")
+        fig.update_layout(xaxis_tickangle=45)
+        return fig
+
+    st.plotly_chart(figures.get_or_build("page2:regions", filter_key, build_regions), use_container_width=True)
+
+    # Chart 2: Trend Over Time
+    st.subheader("Consent Issuance Over Time")
+
+    def build_trend():
+        trend = df_time['StartYear'].value_counts().sort_index().reset_index()
+        trend.columns = ['StartYear', 'count']
+        fig = px.bar(trend, x='StartYear', y='count', title='Yearly Consent Trend')
+        fig.update_layout(bargap=0)
+        return fig
+
+    st.plotly_chart(figures.get_or_build("page2:trend", filter_key, build_trend), use_container_width=True)
+
+    # Chart 3: Runanga distribution
+    st.subheader("Distribution by Runanga")
+
+    def build_runanga():
+        counts = observed_counts(df_time['GIS_Runanga']).nlargest(10).reset_index()
+        counts.columns = ['Runanga', 'Count']
+        return px.bar(counts, x='Runanga', y='Count', title="Top 10 Runanga Regions")
+
+    st.plotly_chart(figures.get_or_build("page2:runanga", filter_key, build_runanga), use_container_width=True)
+
+    # Map Filter: FeatureType selection
+    st.subheader("Consent Locations Map")
+    feature_options = index.values('FeatureType')
+    selected_features = st.multiselect("Select Feature Types for Map", feature_options, default=feature_options)
+    map_bits = bits & index.isin_bits('FeatureType', selected_features) & index.query_bits(notna=MAP_COLUMNS[:2])
+
+    if index.count(map_bits):
+        def build_map():
+            return consent_map(select_rows(frame, index.to_mask(map_bits), MAP_COLUMNS),
+                               title="Discharge Locations by Activity")
+
+        fig_map = figures.get_or_build("page2:map", filter_key + (tuple(selected_features),), build_map)
+        st.plotly_chart(fig_map, use_container_width=True)
+    else:
+        st.warning("No map data for the selected filters.")
+
+# ========== PAGE 3 ==========
+elif page == "Time-Based Analysis":
+    st.header("Time-Based Analysis")
+    frame = page_frame(TIME_COLUMNS, entry)
+    # Yearly counts don't depend on any widget, so they are computed once.
+    start_counts = page_aggregate("start_year_counts", lambda df: year_counts('StartYear'))
+    expiry_counts = page_aggregate("expiry_year_counts", lambda df: year_counts('ExpiryYear'))
+
+    # Histogram of consents per year
+    st.subheader("Consents Issued per Year")
+
+    def build_start_years():
+        counts = start_counts.reset_index()
+        counts.columns = ['StartYear', 'count']
+        fig = px.bar(counts, x='StartYear', y='count', title='Consents Over Time')
+        fig.update_layout(bargap=0)
+        return fig
+
+    st.plotly_chart(figures.get_or_build("page3:start", (version,), build_start_years), use_container_width=True)
+
+    # Bar chart of expiring consents
+    st.subheader("Expiring Consents by Year")
+
+    def build_expiry_years():
+        counts = expiry_counts.reset_index()
+        counts.columns = ['Year', 'Count']
+        return px.bar(counts, x='Year', y='Count', title='Consents Expiring Each Year')
+
+    st.plotly_chart(figures.get_or_build("page3:expiry", (version,), build_expiry_years), use_container_width=True)
+
+    # Table of soon-expiring consents, soonest first, one page at a time
+    expiries = page_aggregate("expiry_index", lambda df: ExpiryIndex(page_frame(['toDate'], entry)))
+    horizon_years = st.slider("Expiry Horizon (years)", 1, 30, 5)
+    st.subheader(f"Upcoming Expiries (Next {horizon_years} Years)")
+    today = pd.Timestamp.today().normalize()
+    upcoming = expiries.window(today, today + pd.DateOffset(years=horizon_years))
+    expiry_pages = page_count(len(upcoming), EXPIRY_PAGE_SIZE)
+    expiry_page = st.number_input(f"Page (of {expiry_pages})", 1, expiry_pages, 1)
+    st.caption(f"{len(upcoming):,} consents expire in the next {horizon_years} years")
+    st.dataframe(take_rows(frame, page_slice(upcoming, expiry_page, EXPIRY_PAGE_SIZE), EXPIRY_COLUMNS),
+                 hide_index=True)
@@ -1,7 +1,8 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from pyproj import Transformer
+
+from reprojection import add_lon_lat
 
 # Load the cleaned dataset
 df = pd.read_csv('/Users/unofficial_storm/Desktop/Cleaned_Data.csv')
@@ -11,8 +12,7 @@ df['fmDate'] = pd.to_datetime(df['fmDate'], errors='coerce')
 df['StartYear'] = df['fmDate'].dt.year
 
 # Convert NZTM (X, Y) to latitude and longitude
-transformer = Transformer.from_crs("EPSG:2193", "EPSG:4326", always_xy=True)
-df['Longitude'], df['Latitude'] = transformer.transform(df['X'].values, df['Y'].values)
+df = add_lon_lat(df)
 
 # Set up the dashboard layout
 st.set_page_config(layout="wide")
@@ -101,8 +101,8 @@ elif page == "Time-Based Analysis":
 
     # Bar chart of expiring consents
     st.subheader("Expiring Consents by Year")
-    df['Expires'] = pd.to_datetime(df['Expires'], errors='coerce')
-    df['ExpiryYear'] = df['Expires'].dt.year
+    df['toDate'] = pd.to_datetime(df['toDate'], errors='coerce')
+    df['ExpiryYear'] = df['toDate'].dt.year
     expiry_counts = df['ExpiryYear'].value_counts().sort_index().reset_index()
     expiry_counts.columns = ['Year', 'Count']
     fig_expire = px.bar(expiry_counts, x='Year', y='Count', title='Consents Expiring Each Year')
@@ -112,4 +112,4 @@ elif page == "Time-Based Analysis":
     st.subheader("Upcoming Expiries (Next 5 Years)")
     upcoming = df[(df['ExpiryYear'] >= pd.Timestamp.now().year) & 
                   (df['ExpiryYear'] <= pd.Timestamp.now().year + 5)]
-    st.dataframe(upcoming[['ConsentNo', 'FeatureType', 'GIS_TerritorialAuthority', 'Expires']].sort_values('Expires'))
+    st.dataframe(upcoming[['ConsentNo', 'FeatureType', 'GIS_TerritorialAuthority', 'toDate']].sort_values('toDate'))
@@ -1,7 +1,8 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from pyproj import Transformer
+
+from reprojection import add_lon_lat
 
 # Set Streamlit layout (must be first Streamlit command)
 st.set_page_config(layout="wide")
@@ -24,8 +25,7 @@ else:
 
 # Coordinate transformation: NZTM to WGS84 (lon/lat)
 if {'X', 'Y'}.issubset(df.columns):
-    transformer = Transformer.from_crs("EPSG:2193", "EPSG:4326", always_xy=True)
-    df['Longitude'], df['Latitude'] = transformer.transform(df['X'].values, df['Y'].values)
+    df = add_lon_lat(df)
 else:
     st.warning("Missing NZTM coordinate columns 'X' and/or 'Y'. Map visualisations may fail.")
 
@@ -1,9 +1,12 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from pyproj import Transformer
 from datetime import datetime
 
+from filter_index import select_rows
+from reprojection import add_lon_lat
+from schema import apply_schema, observed_counts, observed_values
+
 # Set layout and title
 st.set_page_config(layout="wide")
 st.title("Air Discharge Consents Dashboard")
@@ -16,15 +19,13 @@ except FileNotFoundError:
     st.error(f"File not found at path: {csv_path}")
     st.stop()
 
-# Preprocess dates
-df['fmDate'] = pd.to_datetime(df['fmDate'], errors='coerce')
+# Preprocess: categorical/date column types, then derived years
+df = apply_schema(df)
 df['StartYear'] = df['fmDate'].dt.year
-df['toDate'] = pd.to_datetime(df['toDate'], errors='coerce')
 
 # Transform coordinates
 if {'X', 'Y'}.issubset(df.columns):
-    transformer = Transformer.from_crs("EPSG:2193", "EPSG:4326", always_xy=True)
-    df['Longitude'], df['Latitude'] = transformer.transform(df['X'].values, df['Y'].values)
+    df = add_lon_lat(df)
 
 # Sidebar page selector
 page = st.sidebar.selectbox("Choose a page:", ["Discharge Activity Overview", "Regional & Geographic Overview"])
@@ -36,31 +37,33 @@ if page == "Discharge Activity Overview":
     # ConsentStatus filter
     status_option = st.radio("Filter by Consent Status:", ["All", "Issued - Active", "Issued - Inactive"])
     if status_option != "All":
-        filtered_df = df[df['ConsentStatus'] == status_option]
+        status_mask = df['ConsentStatus'] == status_option
     else:
-        filtered_df = df.copy()
+        status_mask = pd.Series(True, index=df.index)
+    # Copy only the columns this page's charts read
+    filtered_df = select_rows(df, status_mask.to_numpy(), ['FeatureType', 'ConsentStatus', 'RMASection'])
 
     # Top N FeatureType slider
     top_n = st.slider("Number of Top Activity Types to Display:", min_value=3, max_value=20, value=10)
 
     # Chart 1: Top Activity Types
     st.subheader(f"Top {top_n} Discharge Activity Types")
-    top_activity_counts = filtered_df['FeatureType'].value_counts().nlargest(top_n).reset_index()
+    top_activity_counts = observed_counts(filtered_df['FeatureType']).nlargest(top_n).reset_index()
     top_activity_counts.columns = ['Activity Type', 'Count']
     fig1 = px.bar(top_activity_counts, x='Activity Type', y='Count', title=f"Top {top_n} Activity Types")
     st.plotly_chart(fig1, use_container_width=True)
 
     # Chart 2: Consent Status by Activity
     st.subheader("Consent Status Breakdown for Top Activities")
-    top5 = filtered_df['FeatureType'].value_counts().nlargest(5).index
+    top5 = observed_counts(filtered_df['FeatureType']).nlargest(5).index
     status_data = filtered_df[filtered_df['FeatureType'].isin(top5)]
-    grouped = status_data.groupby(['FeatureType', 'ConsentStatus']).size().reset_index(name='Count')
+    grouped = status_data.groupby(['FeatureType', 'ConsentStatus'], observed=True).size().reset_index(name='Count')
     fig2 = px.bar(grouped, x='FeatureType', y='Count', color='ConsentStatus', barmode='group')
     st.plotly_chart(fig2, use_container_width=True)
 
     # Chart 3: RMA Section Frequencies
     st.subheader("RMA Legal Sections")
-    rma_counts = filtered_df['RMASection'].value_counts().reset_index()
+    rma_counts = observed_counts(filtered_df['RMASection']).reset_index()
     rma_counts.columns = ['RMA Section', 'Count']
     fig3 = px.bar(rma_counts, x='RMA Section', y='Count', title="Legal Basis Frequency")
     st.plotly_chart(fig3, use_container_width=True)
@@ -73,20 +76,24 @@ elif page == "Regional & Geographic Overview":
     st.sidebar.markdown("### Filter by Consent Start Year")
     min_year, max_year = int(df['StartYear'].min()), int(df['StartYear'].max())
     year_range = st.sidebar.slider("Select Year Range", min_value=min_year, max_value=max_year, value=(min_year, max_year))
-    df_time = df[(df['StartYear'] >= year_range[0]) & (df['StartYear'] <= year_range[1])]
+    time_mask = (df['StartYear'] >= year_range[0]) & (df['StartYear'] <= year_range[1])
 
     # Filter: Region
-    selected_regions = st.sidebar.multiselect("Select Region(s)", df['GIS_TerritorialAuthority'].unique(), default=df['GIS_TerritorialAuthority'].unique())
-    df_time = df_time[df_time['GIS_TerritorialAuthority'].isin(selected_regions)]
+    region_options = observed_values(df['GIS_TerritorialAuthority'])
+    selected_regions = st.sidebar.multiselect("Select Region(s)", region_options, default=region_options)
+    time_mask &= df['GIS_TerritorialAuthority'].isin(selected_regions)
 
     # Filter: Expiring Soon
     if st.sidebar.checkbox("Show only consents expiring in the next 5 years"):
         current_year = datetime.now().year
-        df_time = df_time[(df_time['toDate'].dt.year >= current_year) & (df_time['toDate'].dt.year <= current_year + 5)]
+        time_mask &= (df['toDate'].dt.year >= current_year) & (df['toDate'].dt.year <= current_year + 5)
+
+    # All sidebar predicates are combined; copy only the charted columns once
+    df_time = select_rows(df, time_mask.to_numpy(), ['GIS_TerritorialAuthority', 'StartYear'])
 
     # Chart 1: Consents by Region
     st.subheader("Consents by Territorial Authority")
-    region_counts = df_time['GIS_TerritorialAuthority'].value_counts().reset_index()
+    region_counts = observed_counts(df_time['GIS_TerritorialAuthority']).reset_index()
     region_counts.columns = ['Region', 'Count']
     fig4 = px.bar(region_counts, x='Region', y='Count', title="Consents per Region")
     fig4.update_layout(xaxis_tickangle=45)
@@ -99,8 +106,10 @@ elif page == "Regional & Geographic Overview":
 
     # Map Filter: FeatureType selection
     st.subheader("Consent Locations Map")
-    selected_features = st.multiselect("Select Feature Types for Map", df['FeatureType'].unique(), default=df['FeatureType'].unique())
-    df_map = df_time[df_time['FeatureType'].isin(selected_features)]
+    feature_options = observed_values(df['FeatureType'])
+    selected_features = st.multiselect("Select Feature Types for Map", feature_options, default=feature_options)
+    map_mask = time_mask & df['FeatureType'].isin(selected_features)
+    df_map = select_rows(df, map_mask.to_numpy(), ['Latitude', 'Longitude', 'FeatureType', 'GIS_TerritorialAuthority'])
 
     if df_map['Latitude'].notnull().any() and df_map['Longitude'].notnull().any():
         fig6 = px.scatter_mapbox(
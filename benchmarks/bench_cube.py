@@ -0,0 +1,119 @@
+"""Check the data cube against row-level aggregation and time both.
+
+For a sample of random sidebar filters, every roll-up used by the dashboard
+must equal the ``value_counts``/``groupby`` result on the filtered rows.
+
+Usage: python benchmarks/bench_cube.py [--scale N] [--trials N]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from data_cube import ConsentCube  # noqa: E402
+from data_loader import CSV_PATH  # noqa: E402
+from preprocess import prepare_consents  # noqa: E402
+from run_benchmarks import WORKDIR, scaled_csv  # noqa: E402
+from schema import observed_counts, observed_values  # noqa: E402
+
+
+def random_filters(df, rng):
+    isin = {}
+    if rng.random() < 0.5:
+        isin['ConsentStatus'] = [rng.choice(observed_values(df['ConsentStatus']))]
+    if rng.random() < 0.3:
+        regions = observed_values(df['GIS_TerritorialAuthority'])
+        isin['GIS_TerritorialAuthority'] = rng.sample(regions, rng.randint(1, len(regions)))
+    low = rng.randint(int(df['StartYear'].min()), int(df['StartYear'].max()))
+    high = rng.randint(low, int(df['StartYear'].max()))
+    return isin, {'StartYear': (low, high)}
+
+
+def filter_rows(df, isin, ranges):
+    mask = pd.Series(True, index=df.index)
+    for column, values in isin.items():
+        mask &= df[column].isin(values)
+    for column, (low, high) in ranges.items():
+        mask &= df[column].between(low, high)
+    return df[mask]
+
+
+def row_aggregates(df, isin, ranges):
+    rows = filter_rows(df, isin, ranges)
+    top5 = observed_counts(rows['FeatureType']).nlargest(5).index
+    return {
+        'total': len(rows),
+        'FeatureType': observed_counts(rows['FeatureType']),
+        'GIS_TerritorialAuthority': observed_counts(rows['GIS_TerritorialAuthority']),
+        'RMASection': observed_counts(rows['RMASection']),
+        'StartYear': rows['StartYear'].value_counts().sort_index(),
+        'FeatureType x ConsentStatus': rows[rows['FeatureType'].isin(top5)]
+        .groupby(['FeatureType', 'ConsentStatus'], observed=True).size(),
+    }
+
+
+def cube_aggregates(cube, isin, ranges):
+    top5 = cube.rollup('FeatureType', isin, ranges).nlargest(5).index
+    return {
+        'total': cube.total(isin, ranges),
+        'FeatureType': cube.rollup('FeatureType', isin, ranges),
+        'GIS_TerritorialAuthority': cube.rollup('GIS_TerritorialAuthority', isin, ranges),
+        'RMASection': cube.rollup('RMASection', isin, ranges),
+        'StartYear': cube.rollup('StartYear', isin, ranges).sort_index(),
+        'FeatureType x ConsentStatus': cube.rollup(
+            ['FeatureType', 'ConsentStatus'], dict(isin, FeatureType=list(top5)), ranges),
+    }
+
+
+def assert_same(expected, actual, label):
+    if isinstance(expected, int):
+        assert expected == actual, (label, expected, actual)
+        return
+    # Compare values and order; the index dtype may differ (e.g. int vs float years).
+    assert list(expected.index) == list(actual.index), label
+    assert list(expected.to_numpy()) == list(actual.to_numpy()), label
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--csv", default=os.path.join(REPO_ROOT, CSV_PATH))
+    parser.add_argument("--scale", type=int, default=1, help="distinct copies of the CSV rows")
+    parser.add_argument("--workdir", default=WORKDIR, help="where scaled CSVs are generated and kept")
+    parser.add_argument("--trials", type=int, default=200)
+    args = parser.parse_args()
+
+    # Plain repeats would all be dropped as duplicates at load.
+    df = prepare_consents(pd.read_csv(scaled_csv(args.csv, args.scale, args.workdir)))
+    start = time.perf_counter()
+    cube = ConsentCube(df)
+    build_time = time.perf_counter() - start
+
+    rng = random.Random(0)
+    filters = [random_filters(df, rng) for _ in range(args.trials)]
+    row_time = cube_time = 0.0
+    for isin, ranges in filters:
+        start = time.perf_counter()
+        expected = row_aggregates(df, isin, ranges)
+        row_time += time.perf_counter() - start
+        start = time.perf_counter()
+        actual = cube_aggregates(cube, isin, ranges)
+        cube_time += time.perf_counter() - start
+        for label in expected:
+            assert_same(expected[label], actual[label], label)
+
+    print(f"rows:            {len(df):,}")
+    print(f"cube cells:      {len(cube.counts):,} (built in {build_time * 1000:.1f} ms)")
+    print(f"row scans:       {row_time / args.trials * 1000:8.2f} ms per filter state")
+    print(f"cube roll-ups:   {cube_time / args.trials * 1000:8.2f} ms per filter state")
+    print(f"all {args.trials} filter states matched")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Allocation and peak-memory benchmark for one dashboard interaction.
+
+Compares the original filter chain from Final_Version.py (``df.copy()``,
+chained boolean indexing, ``dropna`` and ``isin`` each building a full-width
+frame) with the bitmap index plus single-projection pipeline.
+
+Two numbers are reported per variant:
+
+* materialised bytes: deep size of every intermediate DataFrame built;
+* tracemalloc peak: Python/NumPy allocations during the interaction. Arrow
+  string buffers are allocated outside tracemalloc, which is why the
+  materialised figure is reported as well.
+
+Usage: python benchmarks/bench_filter_memory.py [--scale N] [--repeat N]
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from data_loader import CSV_PATH  # noqa: E402
+from filter_index import FilterIndex, select_rows  # noqa: E402
+from preprocess import prepare_consents  # noqa: E402
+from run_benchmarks import WORKDIR, scaled_csv  # noqa: E402
+from schema import observed_values  # noqa: E402
+
+MAP_COLUMNS = ['Latitude', 'Longitude', 'FeatureType', 'GIS_TerritorialAuthority']
+
+
+def frame_bytes(*frames):
+    return sum(int(frame.memory_usage(index=True, deep=True).sum()) for frame in frames)
+
+
+def chained(df, index, status, year_range, features):
+    """The pre-index filter chain, as Final_Version.py used to run it."""
+    copied = filtered_df = df.copy()
+    step1 = filtered_df = filtered_df[filtered_df['ConsentStatus'] == status]
+    filtered_df = filtered_df[
+        (filtered_df['StartYear'] >= year_range[0]) &
+        (filtered_df['StartYear'] <= year_range[1])
+    ]
+    map_df = filtered_df.dropna(subset=['Latitude', 'Longitude'])
+    map_filtered_df = map_df[map_df['FeatureType'].isin(features)]
+    return map_filtered_df, frame_bytes(copied, step1, filtered_df, map_df, map_filtered_df)
+
+
+def pipelined(df, index, status, year_range, features):
+    """One combined bitset, one projection of the map's columns."""
+    bits = index.query_bits(
+        isin={'ConsentStatus': [status], 'FeatureType': features},
+        ranges={'StartYear': year_range},
+        notna=['Latitude', 'Longitude'],
+    )
+    map_filtered_df = select_rows(df, index.to_mask(bits), MAP_COLUMNS)
+    return map_filtered_df, frame_bytes(map_filtered_df)
+
+
+def measure(func, df, index, args, repeat):
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result, materialised = func(df, index, *args)
+    elapsed = (time.perf_counter() - start) / repeat
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, materialised, peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--csv", default=os.path.join(REPO_ROOT, CSV_PATH))
+    parser.add_argument("--scale", type=int, default=100, help="distinct copies of the CSV rows")
+    parser.add_argument("--workdir", default=WORKDIR, help="where scaled CSVs are generated and kept")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    # Plain repeats would all be dropped as duplicates at load.
+    df = prepare_consents(pd.read_csv(scaled_csv(args.csv, args.scale, args.workdir)))
+    index = FilterIndex(df)
+    filter_args = (
+        'Issued - Active',
+        (int(df['StartYear'].min()), int(df['StartYear'].max())),
+        observed_values(df['FeatureType']),
+    )
+
+    print(f"rows: {len(df):,}  table: {frame_bytes(df) / 2**20:.1f} MiB")
+    results = {}
+    for name, func in (("chained", chained), ("pipelined", pipelined)):
+        result, materialised, peak, elapsed = measure(func, df, index, filter_args, args.repeat)
+        results[name] = result
+        print(f"{name:10s} materialised {materialised / 2**20:8.1f} MiB  "
+              f"tracemalloc peak {peak / 2**20:8.1f} MiB  {elapsed * 1000:8.1f} ms")
+
+    expected = results["chained"][MAP_COLUMNS].reset_index(drop=True)
+    pd.testing.assert_frame_equal(results["pipelined"].reset_index(drop=True), expected)
+    print("map rows identical")
+
+
+if __name__ == "__main__":
+    main()
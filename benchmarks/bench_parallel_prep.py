@@ -0,0 +1,57 @@
+"""Time serial against partitioned (thread and process pool) preprocessing.
+
+Each parallel result is checked to be identical to the serial one. At least
+two partitions are always used, even on a single core, so the check never
+compares the serial path with itself.
+
+Usage: python benchmarks/bench_parallel_prep.py [--scale N] [--workers N] [--repeat N]
+"""
+
+import argparse
+import os
+import sys
+
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from bench_reprojection import best_of  # noqa: E402
+from data_loader import CSV_PATH  # noqa: E402
+from preprocess import partition_count, prepare_consents  # noqa: E402
+from reprojection import get_transformer  # noqa: E402
+from run_benchmarks import WORKDIR, scaled_csv  # noqa: E402
+
+
+def prepare_copy(**options):
+    # prepare_consents renames columns in place, so each run gets a copy.
+    return lambda frame: prepare_consents(frame.copy(), **options)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--csv", default=os.path.join(REPO_ROOT, CSV_PATH))
+    parser.add_argument("--scale", type=int, default=200, help="copies of the CSV rows")
+    parser.add_argument("--workers", type=int, default=0, help="0 for one per core; at least 2 are used")
+    parser.add_argument("--workdir", default=WORKDIR, help="where scaled CSVs are generated and kept")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    raw = pd.read_csv(scaled_csv(args.csv, args.scale, args.workdir))
+    workers = max(2, args.workers or os.cpu_count() or 1)
+    partitions = partition_count(len(raw), workers)
+    if partitions < 2:
+        sys.exit(f"{len(raw):,} rows make a single partition; raise --scale")
+    get_transformer()  # keep CRS database start-up out of the serial timing
+
+    serial_time, serial = best_of(prepare_copy(workers=1), raw, args.repeat)
+    print(f"rows:    {len(serial):,}  (cores: {os.cpu_count()}, partitions: {partitions})")
+    print(f"serial:  {serial_time * 1000:9.1f} ms")
+    for pool in ("thread", "process"):
+        pool_time, result = best_of(prepare_copy(workers=workers, pool=pool), raw, args.repeat)
+        pd.testing.assert_frame_equal(result, serial)
+        print(f"{pool + ':':8} {pool_time * 1000:9.1f} ms  {serial_time / pool_time:5.2f}x  identical")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Compare the per-row Transformer loop with the vectorised reprojection.
+
+Usage: python benchmarks/bench_reprojection.py [--scale N] [--repeat N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from data_loader import CSV_PATH  # noqa: E402
+from reprojection import get_transformer, nztm_to_wgs84  # noqa: E402
+
+
+def reproject_loop(df):
+    """The original per-row implementation from Final_Version.py."""
+    transformer = get_transformer()
+    coords = df[['X', 'Y']].dropna().values
+    transformed = [transformer.transform(x, y) for x, y in coords]
+
+    out = pd.DataFrame(index=df.index)
+    out['Longitude'] = None
+    out['Latitude'] = None
+    out.loc[df[['X', 'Y']].dropna().index, ['Longitude', 'Latitude']] = transformed
+    return out['Longitude'].to_numpy(dtype='float64'), out['Latitude'].to_numpy(dtype='float64')
+
+
+def reproject_vectorised(df):
+    return nztm_to_wgs84(df['X'].to_numpy(), df['Y'].to_numpy())
+
+
+def best_of(func, df, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(df)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--csv", default=os.path.join(REPO_ROOT, CSV_PATH))
+    parser.add_argument("--scale", type=int, default=10, help="repeat the CSV rows this many times")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.csv, usecols=['X', 'Y'])
+    df = pd.concat([df] * args.scale, ignore_index=True)
+    get_transformer()  # keep CRS database start-up out of both timings
+
+    loop_time, (loop_lon, loop_lat) = best_of(reproject_loop, df, args.repeat)
+    vec_time, (vec_lon, vec_lat) = best_of(reproject_vectorised, df, args.repeat)
+
+    np.testing.assert_allclose(vec_lon, loop_lon, rtol=0, atol=1e-9)
+    np.testing.assert_allclose(vec_lat, loop_lat, rtol=0, atol=1e-9)
+
+    print(f"rows:       {len(df):,}")
+    print(f"loop:       {loop_time * 1000:9.1f} ms")
+    print(f"vectorised: {vec_time * 1000:9.1f} ms")
+    print(f"speed-up:   {loop_time / vec_time:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
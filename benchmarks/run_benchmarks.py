@@ -0,0 +1,242 @@
+"""Headless benchmark of every dashboard stage at several data scales.
+
+Runs the data path of Final_Version.py without Streamlit:
+- CSV load, column strip and duplicate removal
+- reprojection and schema/date parsing
+- index and cube builds
+- filtering
+- aggregation, both row-level and from the cube
+- figure construction and serialisation
+
+It runs against Cleaned_Data.csv and synthetic copies scaled 10x, 100x and
+1000x. Each synthetic copy gets its own ConsentNo suffix and a few metres of
+coordinate jitter, so the copies are distinct consents rather than
+duplicates.
+
+One JSON object per stage and scale is written as a line to stdout (or
+``--output``), with the stage's wall time, tracemalloc peak and the process
+RSS afterwards. A human-readable table goes to stderr.
+
+Usage: python benchmarks/run_benchmarks.py [--scales 1,10,100,1000] [--output results.jsonl]
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from data_cube import ConsentCube  # noqa: E402
+from data_loader import CSV_PATH  # noqa: E402
+from dedup import drop_duplicate_rows  # noqa: E402
+from filter_index import FilterIndex, select_rows  # noqa: E402
+from map_binning import consent_map  # noqa: E402
+from preprocess import DEDUP_MODE, add_coordinates, add_years, clean_columns  # noqa: E402
+from reprojection import get_transformer  # noqa: E402
+from schema import apply_schema, observed_counts  # noqa: E402
+from spatial_index import SpatialIndex  # noqa: E402
+
+MAP_COLUMNS = ['Latitude', 'Longitude', 'FeatureType', 'GIS_TerritorialAuthority']
+# Where scaled CSVs are generated and kept between runs.
+WORKDIR = os.path.join(tempfile.gettempdir(), "consents_bench")
+
+
+def scaled_csv(source, scale, workdir=WORKDIR):
+    """Path of a CSV holding ``scale`` distinct copies of ``source``.
+
+    Each copy gets its own ConsentNo suffix, so no copy duplicates another,
+    and one X/Y offset, so repeated rows inside a copy stay repeated and the
+    dedup stage has the same share of duplicates to drop at every scale.
+    Copies are appended one at a time so generating the 1000x file never
+    holds more than one copy in memory. Generated files are reused.
+    """
+    if scale == 1:
+        return source
+    os.makedirs(workdir, exist_ok=True)
+    path = os.path.join(workdir, f"consents_copies_x{scale}.csv")
+    if os.path.exists(path):
+        return path
+    base = pd.read_csv(source)
+    rng = np.random.default_rng(scale)
+    tmp_path = path + ".tmp"
+    for copy in range(scale):
+        chunk = base.copy()
+        chunk['ConsentNo'] = chunk['ConsentNo'] + f"-{copy}"
+        offset_x, offset_y = rng.normal(0, 5, 2)
+        chunk['X'] = chunk['X'] + offset_x
+        chunk['Y'] = chunk['Y'] + offset_y
+        chunk.to_csv(tmp_path, mode='w' if copy == 0 else 'a', header=copy == 0, index=False)
+    os.replace(tmp_path, path)
+    return path
+
+
+def rss_bytes():
+    """Current resident set size (Linux), falling back to the peak RSS."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class StageRunner:
+    """Times stages and records one result dict per stage."""
+
+    def __init__(self, scale, trace_memory):
+        self.scale = scale
+        self.trace_memory = trace_memory
+        self.results = []
+        # Rows in the table as of the latest stage that returned one: rows
+        # read before dedup, rows kept after it.
+        self.rows = None
+
+    def run(self, stage, func, *args):
+        if self.trace_memory:
+            tracemalloc.start()
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        value = func(*args)
+        wall = time.perf_counter() - start
+        peak = None
+        if self.trace_memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        if isinstance(value, pd.DataFrame):
+            self.rows = len(value)
+        self.results.append({
+            "scale": self.scale,
+            "stage": stage,
+            "rows": self.rows,
+            "wall_s": round(wall, 6),
+            "peak_traced_bytes": peak,
+            "rss_bytes": rss_bytes(),
+        })
+        return value
+
+
+def typical_selection(df):
+    """The sidebar state most users start from: Active, full year range."""
+    isin = {'ConsentStatus': ['Issued - Active']}
+    ranges = {'StartYear': (int(df['StartYear'].min()), int(df['StartYear'].max()))}
+    return isin, ranges
+
+
+def row_aggregates(rows):
+    top5 = observed_counts(rows['FeatureType']).nlargest(5).index
+    return (
+        observed_counts(rows['FeatureType']).nlargest(10),
+        observed_counts(rows['GIS_TerritorialAuthority']).nlargest(10),
+        rows['StartYear'].value_counts(),
+        rows[rows['FeatureType'].isin(top5)].groupby(['FeatureType', 'ConsentStatus'], observed=True).size(),
+    )
+
+
+def cube_aggregates(cube, isin, ranges):
+    return (
+        cube.rollup('FeatureType', isin, ranges).nlargest(10),
+        cube.rollup('GIS_TerritorialAuthority', isin, ranges).nlargest(10),
+        cube.rollup('StartYear', isin, ranges),
+    )
+
+
+def build_figures(aggregates, map_df):
+    import plotly.express as px
+
+    activity, regions, years = aggregates
+    figures = [
+        px.bar(activity.reset_index(), x='count', y='FeatureType', orientation='h'),
+        px.bar(regions.reset_index(), x='GIS_TerritorialAuthority', y='count'),
+        px.bar(years.sort_index().reset_index(), x='StartYear', y='count'),
+        consent_map(map_df),
+    ]
+    # Serialising is what Streamlit does with every figure it sends.
+    return sum(len(figure.to_json()) for figure in figures)
+
+
+def bench_scale(csv, scale, trace_memory):
+    runner = StageRunner(scale, trace_memory)
+    df = runner.run("load_csv", pd.read_csv, csv)
+    df = runner.run("strip_columns", clean_columns, df)
+    df = runner.run("dedup", drop_duplicate_rows, df, DEDUP_MODE)
+    df = runner.run("schema_and_dates", lambda frame: add_years(apply_schema(frame)), df)
+    df = runner.run("reproject", add_coordinates, df)
+    index = runner.run("build_filter_index", FilterIndex, df)
+    cube = runner.run("build_cube", ConsentCube, df)
+    runner.run("build_spatial_index", SpatialIndex, df)
+
+    isin, ranges = typical_selection(df)
+
+    def filter_rows():
+        bits = index.query_bits(isin=isin, ranges=ranges)
+        map_bits = bits & index.query_bits(notna=['Latitude', 'Longitude'])
+        return index.to_mask(bits), select_rows(df, index.to_mask(map_bits), MAP_COLUMNS)
+
+    mask, map_df = runner.run("filter", filter_rows)
+    rows = select_rows(df, mask, ['FeatureType', 'GIS_TerritorialAuthority', 'StartYear', 'ConsentStatus'])
+    runner.run("aggregate_rows", row_aggregates, rows)
+    aggregates = runner.run("aggregate_cube", cube_aggregates, cube, isin, ranges)
+    payload = runner.run("figures", build_figures, aggregates, map_df)
+    runner.results[-1]["payload_bytes"] = payload
+    return runner.results
+
+
+def warm_up():
+    """Pay one-off import, CRS database and first-figure costs before any stage is timed."""
+    get_transformer()
+    # plotly loads its templates and validators while building and
+    # serialising its first figures; a one-row set keeps that out of x1.
+    one = pd.Series([1], name='count')
+    map_df = pd.DataFrame({'Latitude': [-43.5], 'Longitude': [172.6],
+                           'FeatureType': ['warm-up'], 'GIS_TerritorialAuthority': ['warm-up']})
+    build_figures((one.rename_axis('FeatureType'), one.rename_axis('GIS_TerritorialAuthority'),
+                   one.rename_axis('StartYear')), map_df)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--csv", default=os.path.join(REPO_ROOT, CSV_PATH))
+    parser.add_argument("--scales", default="1,10,100,1000",
+                        help="comma-separated multiples of the CSV to benchmark")
+    parser.add_argument("--workdir", default=WORKDIR, help="where scaled CSVs are generated and kept")
+    parser.add_argument("--output", help="write JSON lines here instead of stdout")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="skip tracemalloc for lower-overhead timings")
+    args = parser.parse_args()
+
+    warm_up()
+    run_info = {
+        "started": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+    }
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        for scale in (int(value) for value in args.scales.split(",")):
+            csv = scaled_csv(args.csv, scale, args.workdir)
+            for result in bench_scale(csv, scale, not args.no_memory):
+                out.write(json.dumps(dict(run_info, **result)) + "\n")
+                out.flush()
+                peak = result["peak_traced_bytes"]
+                print(f"x{scale:<5} {result['rows']:>10,} rows  {result['stage']:20s}"
+                      f"{result['wall_s'] * 1000:10.1f} ms"
+                      f"{'' if peak is None else f'{peak / 2**20:10.1f} MiB peak'}"
+                      f"{result['rss_bytes'] / 2**20:10.1f} MiB rss", file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
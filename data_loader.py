@@ -0,0 +1,233 @@
+"""Process-wide cache for the prepared consents table.
+
+Streamlit re-executes the dashboard script on every widget interaction, so the
+table is loaded once per process and shared by every session. Entries are
+keyed on the file's path, mtime and size; a changed file is reloaded on the
+next request. A fresh binary snapshot (see snapshot.py) is preferred over
+parsing the CSV; after a CSV parse the snapshot is rewritten so the next cold
+start can use it. The returned DataFrame is shared between sessions and must be
+treated as read-only (filter into a new frame instead of assigning columns).
+
+Structures computed from the table (indexes, aggregates) are cached on the
+same entry with ``load_derived`` and dropped with it when the file changes.
+Each lookup resolves the current entry; a script that needs the table and its
+structures to agree takes them all from one ``load_entry`` handle instead.
+
+Every function takes the ``prepare`` step the table is built with, and each
+step gets its own entry. The default, ``prepare_consents``, does everything
+up front; ``prepare_base`` leaves dates and coordinates to be derived on
+first use (see derived_columns.py). A fresh snapshot already holds every
+column and is used whichever step was asked for; only the full step writes
+snapshots.
+
+A CSV larger than ``CHUNKED_INGEST_BYTES`` is never parsed whole: it is
+streamed into the snapshot in batches (see ``ingest.ingest_csv``), which is
+then memory-mapped, and the cube accumulated on the way is kept as the
+entry's ``"cube"``.
+
+Delta files of new or changed consents are merged in with ``refresh_delta``
+(see ingest.py). The merged table is published as a new entry, so sessions
+holding the previous entry keep the table and structures they started with.
+Derived structures with an ``updated(removed, added)`` method are carried
+over incrementally; the rest are rebuilt on first use. Merged deltas last until
+the CSV itself changes and is reloaded.
+"""
+
+import itertools
+import os
+import threading
+
+import pandas as pd
+
+from dedup import DuplicateFilter
+from ingest import ingest_csv, merge_delta, read_delta
+from preprocess import DEDUP_MODE, prepare_consents
+from snapshot import read_snapshot, write_snapshot
+
+CSV_PATH = "Cleaned_Data.csv"
+# Refresh the snapshot whenever the CSV had to be parsed.
+WRITE_SNAPSHOTS = True
+# CSVs above this size are ingested in batches rather than read in one go.
+CHUNKED_INGEST_BYTES = 256 * 2**20
+
+_lock = threading.RLock()
+_entries = {}
+_versions = itertools.count(1)
+_stats = {"hits": 0, "misses": 0, "reloads": 0, "snapshot_reads": 0, "csv_reads": 0,
+          "chunked_reads": 0, "delta_applies": 0, "delta_rows": 0, "dropped_duplicates": 0}
+
+
+class _Entry:
+    """One loaded table: ``df``, its ``version`` and the structures built on it."""
+
+    def __init__(self, key, df, structures=None):
+        self.key = key
+        self.df = df
+        self.structures = structures or {}
+        # Structure name -> lock held while that structure is being built.
+        self.building = {}
+        # Delta file path -> file key of the version merged into ``df``.
+        self.deltas = {}
+        # Process-unique, so caches keyed on it never confuse two loads.
+        self.version = next(_versions)
+
+    def derived(self, name, build):
+        """Return ``build(self.df)``, computing it once for this entry."""
+        with _lock:
+            if name in self.structures:
+                return self.structures[name]
+            building = self.building.setdefault(name, threading.Lock())
+        # Built outside the cache lock, so other sessions' lookups (and builds
+        # of other structures) carry on meanwhile; sessions asking for this
+        # one wait on its own lock for the single build.
+        with building:
+            with _lock:
+                if name in self.structures:
+                    return self.structures[name]
+            value = build(self.df)
+            with _lock:
+                self.structures[name] = value
+                self.building.pop(name, None)
+            return value
+
+
+def _file_key(path):
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _read(path, prepare):
+    """Return the prepared table and any derived structures built on the way."""
+    df = read_snapshot(path)
+    if df is not None:
+        _stats["snapshot_reads"] += 1
+        return df, {}
+    full = prepare is prepare_consents
+    if full and WRITE_SNAPSHOTS and os.path.getsize(path) > CHUNKED_INGEST_BYTES:
+        duplicates = DuplicateFilter(DEDUP_MODE)
+        try:
+            cube = ingest_csv(path, duplicates=duplicates)
+        except (ImportError, OSError, ValueError, pd.errors.ParserError):
+            # Without pyarrow or a writable directory, or when a later batch
+            # does not fit the column types guessed from the first (text in a
+            # numeric column), fall back to one read.
+            pass
+        else:
+            df = read_snapshot(path)
+            if df is not None:
+                _stats["chunked_reads"] += 1
+                _stats["dropped_duplicates"] += duplicates.dropped
+                return df, {"cube": cube}
+    _stats["csv_reads"] += 1
+    raw = pd.read_csv(path)
+    df = prepare(raw)
+    # Deduplication is the only step that drops rows.
+    _stats["dropped_duplicates"] += len(raw) - len(df)
+    if full and WRITE_SNAPSHOTS:
+        try:
+            write_snapshot(df, path)
+        except (ImportError, OSError):
+            # The snapshot is only an accelerator; a read-only data directory
+            # or a missing pyarrow just means the next start parses the CSV.
+            pass
+    return df, {}
+
+
+def _entry_key(path, prepare):
+    return (os.path.abspath(path), prepare)
+
+
+def _current_entry(path, prepare=prepare_consents, count_hit=True):
+    path = os.path.abspath(path)
+    key = _file_key(path)
+    with _lock:
+        entry = _entries.get((path, prepare))
+        if entry is not None and entry.key == key:
+            if count_hit:
+                _stats["hits"] += 1
+            return entry
+        _stats["reloads" if entry is not None else "misses"] += 1
+        # Loading under the lock means concurrent sessions wait for a single
+        # read instead of all parsing the same file at once.
+        entry = _Entry(key, *_read(path, prepare))
+        _entries[(path, prepare)] = entry
+        return entry
+
+
+def load_entry(path=CSV_PATH, prepare=prepare_consents):
+    """Return the current cache entry for ``path``, loading it if needed.
+
+    The entry's ``df``, ``version`` and ``derived(name, build)`` all refer to
+    the same table, even if a delta is merged or the CSV reloaded meanwhile.
+    A script that resolves the entry once per rerun and takes everything from
+    it never mixes a table with structures built on a newer one.
+    """
+    return _current_entry(path, prepare)
+
+
+def load_consents(path=CSV_PATH, prepare=prepare_consents):
+    """Return the prepared consents table for ``path``, loading it if needed."""
+    return _current_entry(path, prepare).df
+
+
+def load_derived(name, build, path=CSV_PATH, prepare=prepare_consents):
+    """Return ``build(df)`` for the cached table, computing it once per load.
+
+    ``name`` identifies the structure; the result is shared by all sessions
+    and must be treated as read-only, like the table itself. Lookups are not
+    counted as cache hits, so one rerun shows up as one hit however many
+    structures it uses. ``build`` may itself call ``load_derived``.
+    """
+    return _current_entry(path, prepare, count_hit=False).derived(name, build)
+
+
+def data_version(path=CSV_PATH, prepare=prepare_consents):
+    """Identifier of the currently loaded table, for keying caches built on it."""
+    return _current_entry(path, prepare, count_hit=False).version
+
+
+def refresh_delta(delta_path, path=CSV_PATH):
+    """Merge ``delta_path`` into the cached table if it changed since last time.
+
+    Returns True when a new table version was published. Cheap to call on
+    every rerun: an unchanged delta file costs one ``stat``.
+    """
+    if not os.path.exists(delta_path):
+        return False
+    delta_path = os.path.abspath(delta_path)
+    delta_key = _file_key(delta_path)
+    entry = _current_entry(path, count_hit=False)
+    if entry.deltas.get(delta_path) == delta_key:
+        return False
+
+    delta = read_delta(delta_path)
+    with _lock:
+        current = _entries.get(_entry_key(path, prepare_consents))
+        if current is not entry or entry.deltas.get(delta_path) == delta_key:
+            # Another session merged it, or the CSV was reloaded meanwhile;
+            # the next call sees the new entry.
+            return False
+        merged, removed = merge_delta(entry.df, delta)
+        new_entry = _Entry(entry.key, merged)
+        new_entry.deltas = dict(entry.deltas, **{delta_path: delta_key})
+        for name, value in entry.structures.items():
+            if hasattr(value, "updated"):
+                new_entry.structures[name] = value.updated(removed, delta)
+        _entries[_entry_key(path, prepare_consents)] = new_entry
+        _stats["delta_applies"] += 1
+        _stats["delta_rows"] += len(delta)
+        return True
+
+
+def cache_stats():
+    """Return the cache and source counters and the number of cached files."""
+    with _lock:
+        return dict(_stats, entries=len(_entries))
+
+
+def clear_cache():
+    """Drop every cached table and reset the counters."""
+    with _lock:
+        _entries.clear()
+        for name in _stats:
+            _stats[name] = 0
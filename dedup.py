@@ -0,0 +1,92 @@
+"""Load-time removal of repeated consent rows.
+
+Cleaned_Data.csv repeats some rows verbatim, which inflates every count.
+Rows are compared by a 64-bit hash of their values
+(``pd.util.hash_pandas_object``), so a large file needs one integer per row
+rather than a sort or a join on every column.
+
+Modes:
+
+- ``"rows"``: drop exact duplicates, comparing every column.
+- ``"consent"``: keep one row per ConsentNo. A consent that covers several
+  activities is listed once per activity, so this also collapses those rows.
+  Whitespace inside ConsentNo (the export mixes plain and non-breaking
+  spaces) is normalised before hashing.
+- ``None``: keep every row.
+
+The first occurrence is kept in every mode, and row order is preserved.
+``DuplicateFilter`` applies the same rule across the batches of a chunked
+read, remembering one hash per kept row.
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+DEDUP_MODES = ("rows", "consent", None)
+KEY_COLUMN = 'ConsentNo'
+
+logger = logging.getLogger(__name__)
+
+
+def consent_keys(values):
+    """ConsentNo ``values`` with every run of whitespace as one plain space."""
+    return values.astype(str).str.split().str.join(" ")
+
+
+def row_hashes(df, mode="rows"):
+    """One uint64 hash per row of the values ``mode`` compares."""
+    if mode == "consent":
+        return pd.util.hash_pandas_object(consent_keys(df[KEY_COLUMN]), index=False)
+    return pd.util.hash_pandas_object(df, index=False)
+
+
+def _check_mode(mode):
+    if mode not in DEDUP_MODES:
+        raise ValueError(f"Unknown dedup mode {mode!r}; expected one of {DEDUP_MODES}")
+
+
+def drop_duplicate_rows(df, mode="rows"):
+    """Return ``df`` without repeated rows under ``mode``, logging how many went."""
+    _check_mode(mode)
+    if mode is None or df.empty:
+        return df
+    duplicated = row_hashes(df, mode).duplicated().to_numpy()
+    dropped = int(duplicated.sum())
+    if dropped:
+        logger.info("Dropped %d duplicate rows (%s mode) of %d", dropped, mode, len(df))
+        df = df[~duplicated].reset_index(drop=True)
+    return df
+
+
+class DuplicateFilter:
+    """Drops rows already seen in this or any earlier batch of one table."""
+
+    def __init__(self, mode="rows"):
+        _check_mode(mode)
+        self.mode = mode
+        self.dropped = 0
+        self._seen = np.zeros(0, dtype='uint64')  # sorted hashes of kept rows
+
+    def filter(self, df):
+        if self.mode is None or df.empty:
+            return df
+        hashes = row_hashes(df, self.mode).to_numpy()
+        duplicated = pd.Series(hashes).duplicated().to_numpy()
+        if len(self._seen):
+            # One binary search per row against the hashes kept so far.
+            found = np.searchsorted(self._seen, hashes)
+            duplicated = duplicated | (self._seen[np.minimum(found, len(self._seen) - 1)] == hashes)
+        kept = np.sort(hashes[~duplicated])
+        # Only the batch is sorted; merging it in is one copy of the array.
+        self._seen = np.insert(self._seen, np.searchsorted(self._seen, kept), kept)
+        self.dropped += int(duplicated.sum())
+        if duplicated.any():
+            df = df[~duplicated].reset_index(drop=True)
+        return df
+
+    def log(self, rows):
+        """Log the total dropped, given the number of rows read."""
+        if self.dropped:
+            logger.info("Dropped %d duplicate rows (%s mode) of %d", self.dropped, self.mode, rows)
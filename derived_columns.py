@@ -0,0 +1,56 @@
+"""Columns derived from the consents table on first use instead of at load.
+
+A table loaded with ``prepare_base`` has only the CSV's own columns, typed.
+Dates, years and WGS84 coordinates are computed the first time a page asks
+for one of their columns, then cached on the loaded table's entry (see
+``data_loader.load_entry``) and shared by every session. A page that never shows a map
+never reprojects. Builders reuse what the table already has (a table read
+from a snapshot has parsed dates and coordinates) instead of recomputing it.
+"""
+
+import pandas as pd
+
+from preprocess import add_years
+from reprojection import add_lon_lat
+from schema import DATE_COLUMNS, apply_schema
+
+
+def build_dates(df):
+    """Parsed fmDate/toDate and the StartYear/ExpiryYear taken from them."""
+    # Already-parsed dates are left as they are by apply_schema.
+    dates = df[DATE_COLUMNS].copy()
+    return add_years(apply_schema(dates, categories=False))
+
+
+def build_coordinates(df):
+    """WGS84 Longitude/Latitude reprojected from the NZTM X/Y columns."""
+    if {'Longitude', 'Latitude'}.issubset(df.columns):
+        return df[['Longitude', 'Latitude']]
+    return add_lon_lat(df[['X', 'Y']].copy())[['Longitude', 'Latitude']]
+
+
+# Group name -> (columns it provides, builder). A group is built in one go.
+DERIVED_GROUPS = {
+    'dates': (DATE_COLUMNS + ['StartYear', 'ExpiryYear'], build_dates),
+    'coordinates': (['Longitude', 'Latitude'], build_coordinates),
+}
+_GROUP_OF = {column: group for group, (columns, _) in DERIVED_GROUPS.items() for column in columns}
+
+
+def derived_group(group, entry):
+    """The cached frame of one derived group of ``entry``, built on first use."""
+    return entry.derived(f"derived:{group}", DERIVED_GROUPS[group][1])
+
+
+def page_frame(columns, entry):
+    """The ``columns`` of ``entry``'s table, deriving only the groups they belong to.
+
+    ``entry`` is a ``data_loader.load_entry`` handle. Columns are not copied;
+    like the table, the result is read-only.
+    """
+    parts = {}
+    for column in columns:
+        group = _GROUP_OF.get(column)
+        source = derived_group(group, entry) if group else entry.df
+        parts[column] = source[column]
+    return pd.concat(parts, axis=1)
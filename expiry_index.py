@@ -0,0 +1,51 @@
+"""Sorted index of consent expiry dates.
+
+Built once per loaded table: the row positions of every consent with a
+``toDate``, ordered by that date. "Expiring between A and B" is then two
+binary searches giving a contiguous slice that is already in expiry order,
+so the N soonest expiries, or any page of them, are a slice as well. No
+query scans or sorts the table.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def _ns(when):
+    return pd.Timestamp(when).as_unit('ns').value
+
+
+class ExpiryIndex:
+    """Row positions ordered by expiry date, for window and top-K queries."""
+
+    def __init__(self, df, column='toDate'):
+        self.n = len(df)
+        dates = pd.to_datetime(df[column]).to_numpy(dtype='datetime64[ns]')
+        rows = np.flatnonzero(~np.isnat(dates))
+        stamps = dates[rows].view('int64')
+        order = np.argsort(stamps, kind='stable')
+        self._stamps = stamps[order]
+        self._rows = rows[order]
+
+    def _bounds(self, start=None, end=None):
+        lo = 0 if start is None else np.searchsorted(self._stamps, _ns(start), side='left')
+        hi = len(self._rows) if end is None else np.searchsorted(self._stamps, _ns(end), side='left')
+        return lo, max(lo, hi)
+
+    def window(self, start=None, end=None):
+        """Row positions expiring in ``[start, end)``, soonest first.
+
+        Either bound may be None for an open-ended window.
+        """
+        lo, hi = self._bounds(start, end)
+        return self._rows[lo:hi]
+
+    def count(self, start=None, end=None):
+        """Number of consents expiring in ``[start, end)``."""
+        lo, hi = self._bounds(start, end)
+        return int(hi - lo)
+
+    def soonest(self, k, start=None, end=None):
+        """Row positions of the ``k`` soonest expiries in ``[start, end)``."""
+        lo, hi = self._bounds(start, end)
+        return self._rows[lo:min(hi, lo + k)]
@@ -0,0 +1,93 @@
+"""Chunked export of a filtered selection of consents.
+
+The rows to export are selected by the same boolean masks as the charts.
+They are copied out of the shared table ``CHUNK_ROWS`` at a time and
+appended to a temporary file, so memory use is one chunk whatever the size
+of the selection, and no full-size frame or string is ever built. GeoJSON
+points use the reprojected Longitude/Latitude; rows without coordinates get
+a null geometry.
+"""
+
+import json
+import tempfile
+
+import numpy as np
+
+from filter_index import take_rows
+
+CHUNK_ROWS = 10_000
+# Format -> (file extension, MIME type).
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+    "GeoJSON": ("geojson", "application/geo+json"),
+}
+
+
+def iter_chunks(df, rows, columns, chunk_rows=CHUNK_ROWS):
+    """Yield ``columns`` of the rows at ``rows``, ``chunk_rows`` rows at a time.
+
+    An empty selection yields one empty chunk, so the CSV header and Parquet
+    schema are still written.
+    """
+    if not len(rows):
+        yield take_rows(df, rows, columns)
+        return
+    for start in range(0, len(rows), chunk_rows):
+        yield take_rows(df, rows[start:start + chunk_rows], columns)
+
+
+def write_csv(chunks, out):
+    for number, chunk in enumerate(chunks):
+        out.write(chunk.to_csv(index=False, header=number == 0).encode())
+
+
+def write_parquet(chunks, out):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(out, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def write_geojson(chunks, out):
+    out.write(b'{"type": "FeatureCollection", "features": [')
+    first = True
+    for chunk in chunks:
+        # to_json gives null for missing values and ISO strings for dates.
+        for record in json.loads(chunk.to_json(orient='records', date_format='iso')):
+            lon, lat = record.pop('Longitude'), record.pop('Latitude')
+            geometry = None if lon is None or lat is None else {"type": "Point", "coordinates": [lon, lat]}
+            feature = {"type": "Feature", "geometry": geometry, "properties": record}
+            out.write(("" if first else ",").encode() + json.dumps(feature).encode())
+            first = False
+    out.write(b"]}")
+
+
+_WRITERS = {"CSV": write_csv, "Parquet": write_parquet, "GeoJSON": write_geojson}
+
+
+def export_selection(df, mask, fmt, columns=None, chunk_rows=CHUNK_ROWS):
+    """Write the rows selected by ``mask`` as ``fmt``; return the open file.
+
+    The file is an unbuffered temporary file positioned at the start; it is
+    deleted when closed. ``columns`` defaults to every column of ``df``.
+    """
+    columns = list(df.columns if columns is None else columns)
+    if fmt == "GeoJSON":
+        columns += [column for column in ('Longitude', 'Latitude') if column not in columns]
+    out = tempfile.TemporaryFile()
+    _WRITERS[fmt](iter_chunks(df, np.flatnonzero(mask), columns, chunk_rows), out)
+    out.flush()
+    # The raw file, which st.download_button accepts as it is.
+    raw = out.detach()
+    raw.seek(0)
+    return raw
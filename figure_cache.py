@@ -0,0 +1,98 @@
+"""Process-wide LRU cache of built plotly figures.
+
+Every Streamlit rerun rebuilds all charts, even when the widget that changed
+feeds only one of them. Charts are instead built through
+``figures.get_or_build(chart, inputs, build)``. ``inputs`` must be a hashable
+tuple of everything the chart depends on, including ``data_version()``, so
+a reload never serves a stale figure. Entries are evicted least recently used
+first once the cache exceeds its entry or byte budget; a figure's size is
+its JSON payload, which is what Streamlit sends to the browser anyway.
+
+Cached figures are shared by all sessions and must not be mutated after
+``build`` returns.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+MAX_ENTRIES = 256
+MAX_BYTES = 64 * 2**20
+
+
+class FigureCache:
+    """LRU cache of figures with per-chart hit and build-time counters."""
+
+    def __init__(self, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._figures = OrderedDict()  # (chart, inputs) -> (figure, size)
+        self._bytes = 0
+        self._charts = {}
+
+    def _chart_stats(self, chart):
+        return self._charts.setdefault(
+            chart, {"hits": 0, "builds": 0, "total_build_s": 0.0, "last_build_s": 0.0})
+
+    def get_or_build(self, chart, inputs, build):
+        """Return the cached figure for ``(chart, inputs)`` or build and cache it."""
+        key = (chart, inputs)
+        with self._lock:
+            cached = self._figures.get(key)
+            if cached is not None:
+                self._figures.move_to_end(key)
+                self._chart_stats(chart)["hits"] += 1
+                return cached[0]
+
+        # Build outside the lock so one slow chart doesn't block the others;
+        # two sessions missing on the same key at once both build it.
+        start = time.perf_counter()
+        figure = build()
+        elapsed = time.perf_counter() - start
+        size = len(figure.to_json())
+
+        with self._lock:
+            stats = self._chart_stats(chart)
+            stats["builds"] += 1
+            stats["total_build_s"] += elapsed
+            stats["last_build_s"] = elapsed
+            if size > self.max_bytes:
+                return figure
+            previous = self._figures.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._figures[key] = (figure, size)
+            self._bytes += size
+            while len(self._figures) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._figures.popitem(last=False)
+                self._bytes -= evicted_size
+        return figure
+
+    def timings(self):
+        """Per-chart hits, builds and build times in milliseconds."""
+        with self._lock:
+            return {
+                chart: {
+                    "hits": stats["hits"],
+                    "builds": stats["builds"],
+                    "last_build_ms": stats["last_build_s"] * 1000,
+                    "mean_build_ms": stats["total_build_s"] / stats["builds"] * 1000 if stats["builds"] else 0.0,
+                }
+                for chart, stats in self._charts.items()
+            }
+
+    def usage(self):
+        """Number of cached figures and their total size in bytes."""
+        with self._lock:
+            return {"entries": len(self._figures), "bytes": self._bytes}
+
+    def clear(self):
+        with self._lock:
+            self._figures.clear()
+            self._bytes = 0
+            self._charts.clear()
+
+
+# Shared by every session in the process.
+figures = FigureCache()
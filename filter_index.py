@@ -0,0 +1,145 @@
+"""Bitmap indexes answering the dashboard's sidebar filters.
+
+Built once per loaded table. Every distinct value of a filter column gets a
+packed bitset (one bit per row). Year columns are kept as sorted arrays, so a
+range becomes a binary search. A filter combination is the bitwise AND of
+the relevant bitsets, computed on ``n / 8`` bytes without touching the frame;
+``select_rows`` then copies just the columns a chart uses.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Columns filtered by equality / membership.
+VALUE_COLUMNS = ['ConsentStatus', 'FeatureType', 'GIS_TerritorialAuthority', 'RMASection']
+# Numeric columns filtered by inclusive ranges.
+RANGE_COLUMNS = ['StartYear', 'ExpiryYear']
+# Columns whose missing values can be excluded (the map needs coordinates).
+NOTNA_COLUMNS = ['Longitude', 'Latitude']
+
+
+class FilterIndex:
+    """Per-value bitsets and sorted range indexes over one table."""
+
+    def __init__(self, df, value_columns=VALUE_COLUMNS, range_columns=RANGE_COLUMNS,
+                 notna_columns=NOTNA_COLUMNS):
+        self.n = len(df)
+        self._all = np.packbits(np.ones(self.n, dtype=bool))
+        self._none = np.zeros_like(self._all)
+
+        self._values = {}
+        for column in value_columns:
+            if column not in df.columns:
+                continue
+            series = df[column]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                codes, labels = series.cat.codes.to_numpy(), series.cat.categories
+            else:
+                codes, labels = pd.factorize(series)
+            # One stable argsort groups the rows of every value together, so
+            # each bitset is built from its own slice instead of a full scan.
+            order = np.argsort(codes, kind='stable')
+            bounds = np.searchsorted(codes[order], np.arange(len(labels) + 1))
+            bitsets = {}
+            for code, label in enumerate(labels):
+                rows = order[bounds[code]:bounds[code + 1]]
+                if len(rows):
+                    bitsets[label] = self.rows_bits(rows)
+            self._values[column] = bitsets
+
+        self._ranges = {}
+        for column in range_columns:
+            if column not in df.columns:
+                continue
+            values = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype='float64')
+            order = np.argsort(values, kind='stable')  # NaN sorts last
+            self._ranges[column] = (values[order], order)
+
+        self._notna = {
+            column: np.packbits(df[column].notna().to_numpy())
+            for column in notna_columns if column in df.columns
+        }
+
+    def rows_bits(self, rows):
+        """Bitset with the given row positions set."""
+        mask = np.zeros(self.n, dtype=bool)
+        mask[rows] = True
+        return np.packbits(mask)
+
+    def values(self, column):
+        """Sorted distinct values of ``column`` that occur in the table."""
+        return sorted(self._values[column])
+
+    def present_values(self, column, bits):
+        """Sorted values of ``column`` that occur in the rows set in ``bits``."""
+        return sorted(value for value, value_bits in self._values[column].items()
+                      if np.bitwise_and(value_bits, bits).any())
+
+    def isin_bits(self, column, values):
+        """Bitset of rows whose ``column`` is one of ``values``."""
+        bitsets = self._values[column]
+        bits = self._none.copy()
+        for value in values:
+            if value in bitsets:
+                bits |= bitsets[value]
+        return bits
+
+    def range_bits(self, column, low, high):
+        """Bitset of rows with ``low <= column <= high`` (missing values excluded)."""
+        values, order = self._ranges[column]
+        start = np.searchsorted(values, low, side='left')
+        stop = np.searchsorted(values, high, side='right')
+        return self.rows_bits(order[start:stop])
+
+    def notna_bits(self, column):
+        return self._notna[column]
+
+    def query_bits(self, isin=None, ranges=None, notna=()):
+        """AND together the requested filters and return the packed bitset.
+
+        ``isin`` maps value columns to accepted values, ``ranges`` maps range
+        columns to inclusive ``(low, high)`` bounds and ``notna`` lists
+        columns that must be present. Omitted filters match every row.
+        """
+        bits = self._all.copy()
+        for column, values in (isin or {}).items():
+            bits &= self.isin_bits(column, values)
+        for column, (low, high) in (ranges or {}).items():
+            bits &= self.range_bits(column, low, high)
+        for column in notna:
+            bits &= self.notna_bits(column)
+        return bits
+
+    def query(self, isin=None, ranges=None, notna=()):
+        """Like ``query_bits`` but returns a boolean row mask."""
+        return self.to_mask(self.query_bits(isin, ranges, notna))
+
+    def to_mask(self, bits):
+        return np.unpackbits(bits, count=self.n).view(bool)
+
+    def count(self, bits):
+        """Number of rows set in ``bits``."""
+        return int(np.unpackbits(bits, count=self.n).sum())
+
+
+def select_rows(df, mask, columns):
+    """Copy only ``columns`` of the rows selected by ``mask``, in one step.
+
+    This is the single materialisation a chart needs: no full-width frame is
+    built and then narrowed, and nothing is copied again afterwards.
+    """
+    return take_rows(df, np.flatnonzero(mask), columns)
+
+
+def take_rows(df, rows, columns):
+    """Copy only ``columns`` of the rows at positions ``rows``, in that order.
+
+    Raises KeyError for a column ``df`` does not have, as ``df[columns]`` would.
+    """
+    positions = df.columns.get_indexer(columns)
+    if (positions < 0).any():
+        # iloc would read -1 as the last column and return the wrong data.
+        missing = [column for column, position in zip(columns, positions) if position < 0]
+        raise KeyError(f"{missing} not in the table's columns")
+    return df.iloc[rows, positions]
+
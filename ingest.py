@@ -0,0 +1,94 @@
+"""Incremental ingestion of consent records.
+
+``ingest_csv`` streams a full export that may not fit in memory into its
+snapshot in bounded batches. Each batch is read with fixed column types
+(inferred once from the first batch), deduplicated against every earlier
+batch, date-parsed and reprojected, then appended to the snapshot and added
+to a running ``ConsentCube``. Peak memory is one batch plus the cube and one
+8-byte hash per kept row for deduplication.
+
+A delta file has the same columns as Cleaned_Data.csv and holds only the
+consents that are new or have changed since the full export. Records are
+keyed on ConsentNo, compared with whitespace normalised as in dedup.py (the
+export mixes plain and non-breaking spaces). Every row of the table with a
+ConsentNo that appears in the delta is replaced by the delta's rows for that
+consent, and consents not yet in the table are appended. Only the delta rows are parsed and
+reprojected.
+"""
+
+import pandas as pd
+
+from data_cube import ConsentCube
+from dedup import DuplicateFilter, consent_keys
+from preprocess import DEDUP_MODE, prepare_chunk, prepare_consents
+from schema import align_categories
+from snapshot import write_snapshot_chunks
+
+KEY_COLUMN = 'ConsentNo'
+CHUNK_ROWS = 100_000
+
+
+def csv_dtypes(csv_path, sample_rows=CHUNK_ROWS):
+    """Read types for every column, inferred from the first ``sample_rows`` rows.
+
+    Numeric columns are read as float64 and the rest as strings, so every
+    batch of the file gets the same types whichever values it happens to hold.
+    """
+    sample = pd.read_csv(csv_path, nrows=sample_rows)
+    return {column: 'float64' if pd.api.types.is_numeric_dtype(sample[column]) else 'str'
+            for column in sample.columns}
+
+
+def iter_prepared_chunks(csv_path, chunk_rows=CHUNK_ROWS, dedup=DEDUP_MODE, duplicates=None):
+    """Yield the prepared batches of ``csv_path``, ``chunk_rows`` rows at a time.
+
+    Pass a ``DuplicateFilter`` as ``duplicates`` to read its ``dropped``
+    count afterwards; by default a new one for ``dedup`` is used.
+    """
+    if duplicates is None:
+        duplicates = DuplicateFilter(dedup)
+    rows = 0
+    with pd.read_csv(csv_path, chunksize=chunk_rows, dtype=csv_dtypes(csv_path, chunk_rows)) as reader:
+        for chunk in reader:
+            rows += len(chunk)
+            yield prepare_chunk(chunk, duplicates)
+    duplicates.log(rows)
+
+
+def ingest_csv(csv_path, snapshot_path=None, chunk_rows=CHUNK_ROWS, duplicates=None):
+    """Stream ``csv_path`` into its snapshot; return the table's ``ConsentCube``.
+
+    Returns None, and writes nothing, for a file with no rows. ``duplicates``
+    is passed on to ``iter_prepared_chunks``.
+    """
+    cube = None
+
+    def batches():
+        nonlocal cube
+        for chunk in iter_prepared_chunks(csv_path, chunk_rows, duplicates=duplicates):
+            partial = ConsentCube(chunk)
+            cube = partial if cube is None else cube.merged(partial)
+            yield chunk
+
+    write_snapshot_chunks(batches(), csv_path, snapshot_path)
+    return cube
+
+
+def read_delta(delta_path):
+    """Read and prepare (clean, type, reproject) just the rows of a delta file."""
+    return prepare_consents(pd.read_csv(delta_path))
+
+
+def merge_delta(base, delta, key=KEY_COLUMN):
+    """Return ``(merged, removed)`` for applying ``delta`` to ``base``.
+
+    ``merged`` is a new frame; ``base`` is not modified, so sessions still
+    holding it keep a consistent snapshot. ``removed`` holds the rows of
+    ``base`` that were superseded.
+    """
+    superseded = consent_keys(base[key]).isin(consent_keys(delta[key])).to_numpy()
+    kept, removed = base[~superseded], base[superseded]
+    # Boolean indexing gave new frames, so aligning dtypes leaves base alone.
+    kept, delta = align_categories(kept, delta)
+    merged = pd.concat([kept, delta], ignore_index=True)
+    return merged, removed
@@ -0,0 +1,132 @@
+"""Timing spans around the stages of a dashboard rerun.
+
+Profiling is off unless the ``DASHBOARD_PROFILE`` environment variable is set
+to something other than ``0``. When off, ``profiler.span(name)`` returns one
+shared no-op context manager, so the instrumented script pays for a method
+call and nothing else.
+
+When on, each span's duration is recorded twice: in the session's own
+recorder and in the process-wide recorder. Both keep the most recent
+``MAX_SAMPLES`` durations per span for percentiles. If
+``DASHBOARD_PROFILE_LOG`` names a file, every span is also appended to it as
+one JSON line.
+"""
+
+import contextlib
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+
+import numpy as np
+
+ENABLED = os.environ.get("DASHBOARD_PROFILE", "0") not in ("", "0")
+LOG_PATH = os.environ.get("DASHBOARD_PROFILE_LOG")
+MAX_SAMPLES = 1000
+PERCENTILES = (50, 90, 99)
+
+_NULL_SPAN = contextlib.nullcontext()
+_log_lock = threading.Lock()
+
+
+class Recorder:
+    """Recent span durations by name, summarised as percentiles."""
+
+    def __init__(self, max_samples=MAX_SAMPLES):
+        self._lock = threading.Lock()
+        self._samples = defaultdict(lambda: deque(maxlen=max_samples))
+        self._counts = defaultdict(int)
+
+    def record(self, name, seconds):
+        with self._lock:
+            self._samples[name].append(seconds)
+            self._counts[name] += 1
+
+    def summary(self, percentiles=PERCENTILES):
+        """Per-span call count and duration percentiles in milliseconds."""
+        with self._lock:
+            samples = {name: np.array(values) * 1000 for name, values in self._samples.items()}
+            counts = dict(self._counts)
+        rows = []
+        for name, values in samples.items():
+            row = {"span": name, "count": counts[name]}
+            for p, value in zip(percentiles, np.percentile(values, percentiles)):
+                row[f"p{p}_ms"] = round(float(value), 3)
+            row["max_ms"] = round(float(values.max()), 3)
+            rows.append(row)
+        return rows
+
+
+# Shared by every session in the process.
+process_recorder = Recorder()
+
+
+class _Span:
+    __slots__ = ("_profiler", "_name", "_start")
+
+    def __init__(self, profiler, name):
+        self._profiler = profiler
+        self._name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._profiler.record(self._name, time.perf_counter() - self._start)
+        return False
+
+
+class Profiler:
+    """Records spans for one session into its own and the process recorder."""
+
+    enabled = True
+
+    def __init__(self, session_id=None):
+        self.session_id = session_id or uuid.uuid4().hex[:12]
+        self.recorder = Recorder()
+        self.events = deque(maxlen=MAX_SAMPLES)
+
+    def span(self, name):
+        return _Span(self, name)
+
+    def record(self, name, seconds):
+        self.recorder.record(name, seconds)
+        process_recorder.record(name, seconds)
+        event = {"ts": time.time(), "session": self.session_id, "span": name,
+                 "ms": round(seconds * 1000, 3)}
+        self.events.append(event)
+        if LOG_PATH:
+            line = json.dumps(event) + "\n"
+            with _log_lock, open(LOG_PATH, "a") as log:
+                log.write(line)
+
+    def export_jsonl(self):
+        """This session's recent span events as JSON lines."""
+        return "".join(json.dumps(event) + "\n" for event in self.events)
+
+
+class NullProfiler:
+    """Stand-in used when profiling is disabled; every span is a no-op."""
+
+    enabled = False
+
+    def span(self, name):
+        return _NULL_SPAN
+
+    def record(self, name, seconds):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+
+def session_profiler(session_state):
+    """Return the profiler stored in ``session_state``, creating it on first use."""
+    if not ENABLED:
+        return NULL_PROFILER
+    if "_profiler" not in session_state:
+        session_state["_profiler"] = Profiler()
+    return session_state["_profiler"]
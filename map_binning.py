@@ -0,0 +1,127 @@
+"""Server-side grid binning for the consent locations map.
+
+``px.scatter_mapbox`` ships every point, its hover text and one trace per
+FeatureType to the browser. Past a few thousand consents that payload makes
+pan and zoom sluggish, so the map instead draws one marker per occupied grid
+cell, sized by its consent count. Cells are sized for the requested zoom
+level and coarsened until they fit ``MAX_MARKERS``. In "Auto" mode individual
+consents are shown once the selection is under ``POINT_THRESHOLD`` or the
+map is zoomed in to ``DETAIL_ZOOM``, and never beyond ``MAX_MARKERS``.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Most markers (points or cells) a single map figure may carry.
+MAX_MARKERS = 5000
+# In "Auto" mode, individual consents are drawn up to this many points.
+POINT_THRESHOLD = 1500
+# In "Auto" mode, zoom level from which individual consents are drawn.
+DETAIL_ZOOM = 10
+# Grid cells per 256 px map tile width; about 32 px per cell on screen.
+CELLS_PER_TILE = 8
+
+MAP_MODES = ["Auto", "Clustered", "Individual consents"]
+
+
+def cell_size_for_zoom(zoom):
+    """Grid cell width in degrees of longitude for a mapbox zoom level."""
+    return 360.0 / (2 ** zoom) / CELLS_PER_TILE
+
+
+def grid_bins(df, cell_deg, lon='Longitude', lat='Latitude', category='FeatureType'):
+    """Aggregate points into square ``cell_deg`` cells.
+
+    Returns one row per occupied cell with the consent count, the centroid of
+    its consents and the most common ``category`` value in it.
+    """
+    lons = df[lon].to_numpy(dtype='float64')
+    lats = df[lat].to_numpy(dtype='float64')
+    col = np.floor(lons / cell_deg).astype('int64')
+    row = np.floor(lats / cell_deg).astype('int64')
+    if len(col):
+        # One int64 key per cell so np.unique sorts a flat array.
+        key = (col - col.min()) * (row.max() - row.min() + 1) + (row - row.min())
+        _, cell = np.unique(key, return_inverse=True)
+    else:
+        cell = np.zeros(0, dtype='int64')
+    n_cells = int(cell.max()) + 1 if len(cell) else 0
+
+    counts = np.bincount(cell, minlength=n_cells)
+    bins = pd.DataFrame({
+        'Longitude': np.bincount(cell, weights=lons, minlength=n_cells) / counts,
+        'Latitude': np.bincount(cell, weights=lats, minlength=n_cells) / counts,
+        'Count': counts,
+    })
+
+    if category in df.columns and n_cells:
+        codes, labels = pd.factorize(df[category])
+        present = codes >= 0
+        per_cell = np.bincount(cell[present] * len(labels) + codes[present],
+                               minlength=n_cells * len(labels)).reshape(n_cells, len(labels))
+        bins['Top ' + category] = np.asarray(labels, dtype=object)[per_cell.argmax(axis=1)]
+    return bins
+
+
+def bin_points(df, zoom, max_markers=MAX_MARKERS):
+    """Grid-bin ``df`` for ``zoom``, doubling the cell size until it fits."""
+    cell_deg = cell_size_for_zoom(zoom)
+    bins = grid_bins(df, cell_deg)
+    while len(bins) > max_markers:
+        cell_deg *= 2
+        bins = grid_bins(df, cell_deg)
+    return bins
+
+
+def use_clusters(n_points, zoom, mode):
+    """Whether ``mode`` draws ``n_points`` consents at ``zoom`` as clusters."""
+    if mode == "Clustered":
+        return True
+    if n_points > MAX_MARKERS:
+        return True
+    if mode == "Individual consents":
+        return False
+    return n_points > POINT_THRESHOLD and zoom < DETAIL_ZOOM
+
+
+def consent_map(df, zoom=5, mode="Auto", center=None, height=600,
+                title="Discharge Locations by Activity Type"):
+    """Build the consent map figure, clustering server-side when needed.
+
+    ``df`` needs Longitude, Latitude, FeatureType and GIS_TerritorialAuthority.
+    ``center`` is an optional ``{'lat': ..., 'lon': ...}`` map centre.
+    Individual consents are never drawn beyond ``MAX_MARKERS``, whatever the
+    mode.
+    """
+    import plotly.express as px  # deferred: the first map pays for the import
+
+    if not use_clusters(len(df), zoom, mode):
+        return px.scatter_mapbox(
+            df,
+            lat='Latitude',
+            lon='Longitude',
+            color='FeatureType',
+            hover_name='GIS_TerritorialAuthority',
+            mapbox_style="carto-positron",
+            zoom=zoom,
+            center=center,
+            height=height,
+            title=title,
+        )
+
+    bins = bin_points(df, zoom)
+    return px.scatter_mapbox(
+        bins,
+        lat='Latitude',
+        lon='Longitude',
+        size='Count',
+        color='Count',
+        hover_data={'Count': True, 'Top FeatureType': True, 'Latitude': False, 'Longitude': False},
+        color_continuous_scale='Viridis',
+        size_max=30,
+        mapbox_style="carto-positron",
+        zoom=zoom,
+        center=center,
+        height=height,
+        title=f"{title} ({len(df):,} consents in {len(bins):,} clusters)",
+    )
@@ -0,0 +1,118 @@
+"""Preparation steps applied to the raw consents table after it is read.
+
+Date parsing, reprojection and the derived year columns work row by row, so
+for a large table ``prepare_consents`` can run them on partitions in a pool
+of workers (``DASHBOARD_PREP_WORKERS``, 0 for one per core) and concatenate
+the parts in order. Categoricals are assigned after the concat, exactly as
+the serial path assigns them, so the result is identical either way.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
+
+import pandas as pd
+
+from dedup import drop_duplicate_rows
+from reprojection import add_lon_lat
+from schema import apply_schema
+
+# How repeated rows are dropped at load (see dedup.py); None keeps them all.
+DEDUP_MODE = "rows"
+# Workers for the row-wise steps; 1 runs them inline, 0 uses every core.
+PREP_WORKERS = int(os.environ.get("DASHBOARD_PREP_WORKERS", "1"))
+# "process" sidesteps the GIL for date parsing; "thread" avoids copying parts.
+PREP_POOL = os.environ.get("DASHBOARD_PREP_POOL", "process")
+# Smaller tables are not worth shipping to workers.
+MIN_PARTITION_ROWS = 50_000
+
+
+def clean_columns(df):
+    """Strip stray whitespace from the column names."""
+    df.columns = df.columns.str.strip()
+    return df
+
+
+def add_coordinates(df):
+    """Add WGS84 Longitude/Latitude columns from the NZTM X/Y columns."""
+    return add_lon_lat(df)
+
+
+def add_years(df):
+    """Derive StartYear/ExpiryYear from the (already typed) fmDate/toDate."""
+    if 'fmDate' in df.columns:
+        df['StartYear'] = df['fmDate'].dt.year
+    else:
+        df['StartYear'] = None
+    if 'toDate' in df.columns:
+        df['ExpiryYear'] = df['toDate'].dt.year
+    return df
+
+
+def prepare_partition(df):
+    """The row-wise steps: date parsing, reprojection and the year columns."""
+    df = apply_schema(df, categories=False)
+    df = add_coordinates(df)
+    df = add_years(df)
+    return df
+
+
+def partition_count(rows, workers=PREP_WORKERS):
+    """How many partitions to split ``rows`` rows into for ``workers`` workers."""
+    workers = workers or os.cpu_count() or 1
+    return max(1, min(workers, rows // MIN_PARTITION_ROWS))
+
+
+def _prepare_parallel(df, partitions, pool):
+    bounds = [len(df) * i // partitions for i in range(partitions + 1)]
+    parts = [df.iloc[start:stop] for start, stop in zip(bounds, bounds[1:])]
+    if pool == "thread":
+        # pyproj transformers are thread-safe; each part is a new frame, so
+        # the workers never write to a shared one.
+        executor = ThreadPoolExecutor(partitions)
+    else:
+        # Spawned rather than forked: forking the threaded Streamlit server
+        # can copy a lock that some other thread holds.
+        executor = ProcessPoolExecutor(partitions, mp_context=get_context("spawn"))
+    with executor:
+        prepared = list(executor.map(prepare_partition, parts))
+    merged = pd.concat(prepared)
+    merged.index = df.index
+    return merged
+
+
+def prepare_consents(df, dedup=DEDUP_MODE, workers=PREP_WORKERS, pool=PREP_POOL):
+    """Run every preparation step the dashboard relies on."""
+    df = clean_columns(df)
+    # Before typing and reprojection, so duplicates are never converted.
+    df = drop_duplicate_rows(df, dedup)
+    partitions = partition_count(len(df), workers)
+    if partitions > 1:
+        df = apply_schema(_prepare_parallel(df, partitions, pool))
+    else:
+        df = apply_schema(df)
+        df = add_coordinates(df)
+        df = add_years(df)
+    return df
+
+
+def prepare_base(df, dedup=DEDUP_MODE):
+    """Clean, deduplicate and type the categoricals, but skip the row-wise steps.
+
+    For apps that derive dates and coordinates only when a page first needs
+    them (see derived_columns.py).
+    """
+    df = clean_columns(df)
+    df = drop_duplicate_rows(df, dedup)
+    return apply_schema(df, dates=False)
+
+
+def prepare_chunk(df, duplicates):
+    """Prepare one batch of a chunked read (see ingest.iter_prepared_chunks).
+
+    ``duplicates`` is the ``DuplicateFilter`` shared by every batch of the
+    file. Categorical columns are left as plain strings.
+    """
+    df = clean_columns(df)
+    df = duplicates.filter(df)
+    return prepare_partition(df)
@@ -0,0 +1,45 @@
+"""Server-side sorting and paging for the consent records table.
+
+Sending a whole selection to ``st.dataframe`` serialises every row to the
+browser. Instead, one stable sort order per column is computed the first
+time that column is sorted on and cached with the table. A rerun then
+applies the filter mask to that order (one pass, no sort), slices out the
+requested page, and copies just the visible rows and projected columns.
+"""
+
+import numpy as np
+
+PAGE_SIZES = [25, 50, 100, 250]
+
+
+class SortOrder:
+    """Row positions of one table ordered by ``column``, missing values last."""
+
+    def __init__(self, df, column):
+        values = df[column].reset_index(drop=True)
+        self._order = values.sort_values(kind='stable', na_position='last').index.to_numpy()
+        self._valid = int(values.notna().sum())
+
+    def rows(self, mask=None, descending=False):
+        """Positions of the rows selected by ``mask`` in sort order.
+
+        Descending order reverses the non-missing values; missing values
+        stay last either way.
+        """
+        order = self._order
+        if descending:
+            order = np.concatenate([order[:self._valid][::-1], order[self._valid:]])
+        if mask is not None:
+            order = order[mask[order]]
+        return order
+
+
+def page_count(total, page_size):
+    """Number of pages needed for ``total`` rows; at least one."""
+    return max(1, -(-total // page_size))
+
+
+def page_slice(rows, page, page_size):
+    """The row positions on 1-based ``page``."""
+    start = (page - 1) * page_size
+    return rows[start:start + page_size]
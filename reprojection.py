@@ -0,0 +1,65 @@
+"""Vectorised NZTM2000 (EPSG:2193) to WGS84 (EPSG:4326) reprojection."""
+
+import threading
+
+import numpy as np
+
+NZTM = "EPSG:2193"
+WGS84 = "EPSG:4326"
+
+_lock = threading.Lock()
+_transformer = None
+_inverse = None
+
+
+def get_transformer():
+    """Return the shared NZTM -> WGS84 transformer, creating it on first use."""
+    global _transformer
+    if _transformer is None:
+        with _lock:
+            if _transformer is None:
+                from pyproj import Transformer
+                _transformer = Transformer.from_crs(NZTM, WGS84, always_xy=True)
+    return _transformer
+
+
+def get_inverse_transformer():
+    """Return the shared WGS84 -> NZTM transformer, creating it on first use."""
+    global _inverse
+    if _inverse is None:
+        with _lock:
+            if _inverse is None:
+                from pyproj import Transformer
+                _inverse = Transformer.from_crs(WGS84, NZTM, always_xy=True)
+    return _inverse
+
+
+def wgs84_to_nztm(lon, lat):
+    """Project WGS84 longitude/latitude (scalars or arrays) to NZTM metres."""
+    return get_inverse_transformer().transform(lon, lat)
+
+
+def nztm_to_wgs84(x, y):
+    """Reproject NZTM easting/northing arrays to (longitude, latitude).
+
+    Both outputs are float64 arrays. Rows where either input is missing or
+    not finite come back as NaN instead of being passed to PROJ.
+    """
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    lon = np.full(x.shape, np.nan)
+    lat = np.full(y.shape, np.nan)
+    valid = np.isfinite(x) & np.isfinite(y)
+    if valid.any():
+        lon[valid], lat[valid] = get_transformer().transform(x[valid], y[valid])
+    return lon, lat
+
+
+def add_lon_lat(df, x_col='X', y_col='Y'):
+    """Add float64 Longitude/Latitude columns to ``df`` from its NZTM columns."""
+    if {x_col, y_col}.issubset(df.columns):
+        df['Longitude'], df['Latitude'] = nztm_to_wgs84(df[x_col].to_numpy(), df[y_col].to_numpy())
+    else:
+        df['Longitude'] = np.full(len(df), np.nan)
+        df['Latitude'] = np.full(len(df), np.nan)
+    return df
@@ -0,0 +1,102 @@
+"""Column types for the consents table.
+
+Low-cardinality text columns are stored as categoricals so filters and
+counts compare small integer codes instead of Python strings, and the date
+columns are stored as datetime64. Bump ``SCHEMA_VERSION`` whenever these lists
+change; binary snapshots built under another version are rebuilt.
+
+Run ``python schema.py [path/to/Cleaned_Data.csv]`` for a per-column memory
+report of the raw CSV types against the schema types.
+"""
+
+import sys
+
+import pandas as pd
+
+SCHEMA_VERSION = 1
+
+CATEGORY_COLUMNS = [
+    'ConsentStatus',
+    'ConsentType',
+    'ConsentSource',
+    'PermitType',
+    'FeatureType',
+    'RMASection',
+    'GIS_TerritorialAuthority',
+    'GIS_Catchment',
+    'GIS_CWMSZone',
+    'GIS_Runanga',
+]
+
+DATE_COLUMNS = ['fmDate', 'toDate']
+
+
+def apply_schema(df, categories=True, dates=True):
+    """Convert the schema columns present in ``df`` to their declared types.
+
+    With ``categories=False`` only the dates are converted; batches of a
+    chunked read keep plain strings, because each batch would otherwise get
+    its own set of categories. With ``dates=False`` the date columns are left
+    as text for parsing on first use.
+    """
+    for column in CATEGORY_COLUMNS if categories else []:
+        if column in df.columns and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype('category')
+    for column in DATE_COLUMNS if dates else []:
+        if column in df.columns and not pd.api.types.is_datetime64_any_dtype(df[column]):
+            df[column] = pd.to_datetime(df[column], errors='coerce')
+    return df
+
+
+def align_categories(*frames):
+    """Give each categorical schema column the same categories in every frame.
+
+    ``pd.concat`` only keeps a categorical dtype when the categories match;
+    otherwise the column silently falls back to object.
+    """
+    for column in CATEGORY_COLUMNS:
+        present = [frame for frame in frames if column in frame.columns]
+        if not present:
+            continue
+        categories = sorted(set().union(*(frame[column].dropna().unique().tolist() for frame in present)))
+        for frame in present:
+            frame[column] = pd.Categorical(frame[column], categories=categories)
+    return frames
+
+
+def observed_values(series):
+    """Return the sorted distinct non-null values actually present in ``series``.
+
+    Unlike ``series.unique()`` on a categorical, the result is a plain list
+    suitable for widget options.
+    """
+    return sorted(series.dropna().unique().tolist())
+
+
+def observed_counts(series):
+    """``value_counts`` without the zero rows categoricals add for unused categories."""
+    counts = series.value_counts()
+    return counts[counts > 0]
+
+
+def memory_report(before, after):
+    """Return per-column memory use (bytes) of two versions of the same table."""
+    report = pd.DataFrame({
+        'before_dtype': before.dtypes.astype(str),
+        'after_dtype': after.dtypes.astype(str),
+        'before_bytes': before.memory_usage(index=False, deep=True),
+        'after_bytes': after.memory_usage(index=False, deep=True),
+    })
+    report.loc['TOTAL'] = ['', '', report['before_bytes'].sum(), report['after_bytes'].sum()]
+    report['ratio'] = (report['after_bytes'] / report['before_bytes']).round(3)
+    return report
+
+
+if __name__ == "__main__":
+    csv = sys.argv[1] if len(sys.argv) > 1 else "Cleaned_Data.csv"
+    raw = pd.read_csv(csv)
+    raw.columns = raw.columns.str.strip()
+    typed = apply_schema(raw.copy())
+    with pd.option_context('display.width', 160, 'display.max_columns', None, 'display.max_rows', None):
+        print(f"Schema version {SCHEMA_VERSION}")
+        print(memory_report(raw, typed))
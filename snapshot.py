@@ -0,0 +1,139 @@
+"""Binary columnar snapshot of the prepared consents table.
+
+The snapshot is an uncompressed Feather (Arrow IPC) file holding the table
+exactly as ``prepare_consents`` leaves it: categoricals are dictionary-encoded,
+dates are timestamps and Longitude/Latitude/StartYear/ExpiryYear are already
+computed and duplicates are already dropped. It records the mtime and size of
+the CSV it was built from and the dedup mode, so a snapshot that no longer
+matches its CSV or settings is ignored.
+
+A snapshot can also be written batch by batch (``write_snapshot_chunks``), in
+which case the categorical columns are stored as plain strings and typed when
+the snapshot is read.
+
+Build it with ``python snapshot.py [path/to/Cleaned_Data.csv]``.
+"""
+
+import json
+import os
+import sys
+
+import pandas as pd
+
+from preprocess import DEDUP_MODE, prepare_consents
+from schema import SCHEMA_VERSION, apply_schema
+
+# Bump when the file layout or the derived columns change; column type changes
+# are covered by SCHEMA_VERSION. Either mismatch makes a snapshot stale.
+FORMAT_VERSION = 1
+METADATA_KEY = b"consents_snapshot"
+
+
+def snapshot_path_for(csv_path):
+    """Return the snapshot file that sits next to ``csv_path``."""
+    return os.path.splitext(csv_path)[0] + ".feather"
+
+
+def _source_info(csv_path):
+    stat = os.stat(csv_path)
+    return {"version": FORMAT_VERSION, "schema": SCHEMA_VERSION, "dedup": DEDUP_MODE,
+            "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def write_snapshot(df, csv_path, snapshot_path=None):
+    """Write an already prepared table as the snapshot for ``csv_path``."""
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    snapshot_path = snapshot_path or snapshot_path_for(csv_path)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[METADATA_KEY] = json.dumps(_source_info(csv_path)).encode()
+    table = table.replace_schema_metadata(metadata)
+
+    # Write to a temporary file first so readers never map a half-written file.
+    tmp_path = snapshot_path + ".tmp"
+    feather.write_feather(table, tmp_path, compression="uncompressed")
+    os.replace(tmp_path, snapshot_path)
+    return snapshot_path
+
+
+def write_snapshot_chunks(chunks, csv_path, snapshot_path=None):
+    """Write prepared batches as the snapshot for ``csv_path``, one at a time.
+
+    Only the batch being written is held in memory. The first batch fixes the
+    column types; integer columns are widened to float64 because a later
+    batch may hold missing values. Returns None if ``chunks`` was empty.
+    """
+    import pyarrow as pa
+
+    snapshot_path = snapshot_path or snapshot_path_for(csv_path)
+    tmp_path = snapshot_path + ".tmp"
+    schema = None
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                fields = [pa.field(field.name, pa.float64()) if pa.types.is_integer(field.type) else field
+                          for field in table.schema.remove_metadata()]
+                schema = pa.schema(fields, metadata={METADATA_KEY: json.dumps(_source_info(csv_path)).encode()})
+                writer = pa.ipc.new_file(tmp_path, schema)
+            writer.write_table(table.cast(schema))
+    except BaseException:
+        # A batch that failed to parse or convert leaves no partial file.
+        if writer is not None:
+            writer.close()
+            os.remove(tmp_path)
+        raise
+    if writer is None:
+        return None
+    writer.close()
+    os.replace(tmp_path, snapshot_path)
+    return snapshot_path
+
+
+def build_snapshot(csv_path, snapshot_path=None):
+    """Parse and prepare ``csv_path`` and write it out as a snapshot."""
+    df = prepare_consents(pd.read_csv(csv_path))
+    return write_snapshot(df, csv_path, snapshot_path)
+
+
+def is_fresh(csv_path, snapshot_path=None):
+    """Return True if the snapshot exists and was built from this CSV."""
+    snapshot_path = snapshot_path or snapshot_path_for(csv_path)
+    if not os.path.exists(snapshot_path):
+        return False
+    try:
+        import pyarrow as pa
+    except ImportError:
+        return False
+    try:
+        with pa.memory_map(snapshot_path) as source:
+            schema = pa.ipc.open_file(source).schema
+    except (OSError, pa.ArrowInvalid):
+        return False
+    stored = (schema.metadata or {}).get(METADATA_KEY)
+    return stored is not None and json.loads(stored) == _source_info(csv_path)
+
+
+def read_snapshot(csv_path, snapshot_path=None):
+    """Load the snapshot for ``csv_path``, or return None if it is unusable.
+
+    The file is memory-mapped, so no text is parsed and only the columns
+    pandas has to convert are copied out of the page cache.
+    """
+    snapshot_path = snapshot_path or snapshot_path_for(csv_path)
+    if not is_fresh(csv_path, snapshot_path):
+        return None
+    import pyarrow as pa
+
+    with pa.memory_map(snapshot_path) as source:
+        table = pa.ipc.open_file(source).read_all()
+    # A no-op for a snapshot of a whole table; types batch-written strings.
+    return apply_schema(table.to_pandas(split_blocks=True))
+
+
+if __name__ == "__main__":
+    csv = sys.argv[1] if len(sys.argv) > 1 else "Cleaned_Data.csv"
+    print(f"Wrote {build_snapshot(csv)}")
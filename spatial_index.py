@@ -0,0 +1,67 @@
+"""Grid spatial index over the NZTM X/Y coordinates of each consent.
+
+NZTM2000 is a metric projection, so square grid cells and Euclidean
+distances on X/Y need no reprojection. Rows are sorted by cell key; a query
+visits only the cells overlapping its box (one binary search per grid
+column) and checks exact coordinates for just those candidates.
+"""
+
+import numpy as np
+
+# Grid cell edge in metres.
+CELL_SIZE_M = 5000.0
+# Cell rows per grid column in the key space (NZ spans ~1,600 km north-south).
+_KEY_STRIDE = 1 << 32
+
+
+class SpatialIndex:
+    """Bounding-box and radius queries over the rows of one table."""
+
+    def __init__(self, df, x='X', y='Y', cell_size=CELL_SIZE_M):
+        self.n = len(df)
+        self.cell_size = float(cell_size)
+        self._x = df[x].to_numpy(dtype='float64')
+        self._y = df[y].to_numpy(dtype='float64')
+
+        rows = np.flatnonzero(np.isfinite(self._x) & np.isfinite(self._y))
+        keys = self._cell_x(self._x[rows]) * _KEY_STRIDE + self._cell_y(self._y[rows])
+        order = np.argsort(keys, kind='stable')
+        self._keys = keys[order]
+        self._rows = rows[order]
+
+    def _cell_x(self, x):
+        return np.floor(np.asarray(x) / self.cell_size).astype('int64')
+
+    def _cell_y(self, y):
+        # Offset keeps the row part of the key non-negative.
+        return np.floor(np.asarray(y) / self.cell_size).astype('int64') + _KEY_STRIDE // 2
+
+    def _candidates(self, xmin, ymin, xmax, ymax):
+        cy0, cy1 = int(self._cell_y(ymin)), int(self._cell_y(ymax))
+        slices = []
+        for cx in range(int(self._cell_x(xmin)), int(self._cell_x(xmax)) + 1):
+            start = np.searchsorted(self._keys, cx * _KEY_STRIDE + cy0, side='left')
+            stop = np.searchsorted(self._keys, cx * _KEY_STRIDE + cy1, side='right')
+            if stop > start:
+                slices.append(self._rows[start:stop])
+        return np.concatenate(slices) if slices else np.zeros(0, dtype='int64')
+
+    def bbox(self, xmin, ymin, xmax, ymax):
+        """Sorted row positions with ``xmin <= X <= xmax`` and ``ymin <= Y <= ymax``."""
+        rows = self._candidates(xmin, ymin, xmax, ymax)
+        x, y = self._x[rows], self._y[rows]
+        inside = (x >= xmin) & (x <= xmax) & (y >= ymin) & (y <= ymax)
+        return np.sort(rows[inside])
+
+    def within(self, x, y, radius_m):
+        """Row positions within ``radius_m`` metres of NZTM point ``(x, y)``.
+
+        Returns ``(rows, distances)`` ordered nearest first.
+        """
+        rows = self._candidates(x - radius_m, y - radius_m, x + radius_m, y + radius_m)
+        distances = np.hypot(self._x[rows] - x, self._y[rows] - y)
+        inside = distances <= radius_m
+        rows, distances = rows[inside], distances[inside]
+        order = np.argsort(distances, kind='stable')
+        return rows[order], distances[order]
+
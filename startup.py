@@ -0,0 +1,109 @@
+"""Process warm-up and a breakdown of where start-up time goes.
+
+A new worker process pays some costs once, before its first chart:
+importing plotly, opening the PROJ CRS database for the transformers, and
+loading the table and its derived structures. ``start_warmup`` pays them on a
+daemon thread the first time the dashboard runs in a process, right after
+the title is painted. The script's own loader calls wait on the same cache
+lock rather than repeating the work, and the plotly and PROJ start-up
+overlap with the data load instead of following it.
+
+Each step's offset and duration are recorded, along with milestones such as
+the first paint, for the dashboard's startup panel. ``python startup.py``
+runs the same steps in the foreground and prints the breakdown. As an
+image-build or readiness step, it also leaves a fresh snapshot behind for
+new replicas.
+"""
+
+import logging
+import sys
+import threading
+import time
+
+from data_loader import CSV_PATH, load_consents, load_derived
+
+logger = logging.getLogger(__name__)
+
+# Offsets are measured from when this module is first imported, which for
+# the dashboard is while its imports run, just before the first paint.
+_origin = time.perf_counter()
+_lock = threading.Lock()
+_steps = []
+_thread = None
+
+
+def _record(step, start, end):
+    with _lock:
+        _steps.append({
+            "step": step,
+            "thread": threading.current_thread().name,
+            "start_ms": round((start - _origin) * 1000, 1),
+            "ms": round((end - start) * 1000, 1),
+        })
+
+
+def _timed(step, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    _record(step, start, time.perf_counter())
+    return result
+
+
+def mark(milestone):
+    """Record a point in time (e.g. "first paint") as an offset from start-up."""
+    now = time.perf_counter()
+    _record(milestone, now, now)
+
+
+def _import_plotly():
+    import plotly.express  # noqa: F401
+
+
+def _build_transformers():
+    from reprojection import get_inverse_transformer, get_transformer
+
+    get_transformer()
+    get_inverse_transformer()
+
+
+def warm_up(path=CSV_PATH, derived=None):
+    """Run every start-up step now, in this thread.
+
+    ``derived`` maps ``load_derived`` names to their builders.
+    """
+    _timed("import plotly", _import_plotly)
+    _timed("CRS transformers", _build_transformers)
+    _timed("load table", load_consents, path)
+    for name, build in (derived or {}).items():
+        _timed(f"build {name}", load_derived, name, build, path)
+
+
+def _run(path, derived):
+    try:
+        warm_up(path, derived)
+    except Exception:
+        # The script makes the same calls and reports the error itself.
+        logger.exception("Background warm-up failed")
+
+
+def start_warmup(path=CSV_PATH, derived=None):
+    """Start the warm-up thread once per process; True if this call started it."""
+    global _thread
+    with _lock:
+        if _thread is not None:
+            return False
+        _thread = threading.Thread(target=_run, args=(path, derived), name="warmup", daemon=True)
+    _thread.start()
+    return True
+
+
+def breakdown():
+    """Recorded steps and milestones, in start order."""
+    with _lock:
+        return sorted(_steps, key=lambda step: step["start_ms"])
+
+
+if __name__ == "__main__":
+    warm_up(sys.argv[1] if len(sys.argv) > 1 else CSV_PATH)
+    for step in breakdown():
+        print(f"{step['start_ms']:9.1f} ms  {step['ms']:9.1f} ms  {step['step']}")
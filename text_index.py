@@ -0,0 +1,90 @@
+"""Inverted index for finding consents by site, activity or consent number.
+
+Built once per loaded table. ``Location`` and ``ActivityText`` are split
+into lowercase alphanumeric tokens. Each token's row positions are stored
+as one sorted run in a single array, and the vocabulary is sorted, so every
+token that starts with a query word is a contiguous range of runs. A query
+is the intersection of one binary search and one slice per word.
+
+ConsentNo values are normalised (upper case, any run of whitespace,
+including the export's non-breaking spaces, as a single space) and sorted,
+so a consent number prefix such as "CRC 9619" is also one binary search.
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+TEXT_COLUMNS = ['Location', 'ActivityText']
+KEY_COLUMN = 'ConsentNo'
+TOKEN_PATTERN = r"[a-z0-9]+"
+# Sorts after every character that can appear in a token.
+_PREFIX_END = "￿"
+
+
+def tokenize(text):
+    """Lowercase alphanumeric words of ``text``."""
+    return re.findall(TOKEN_PATTERN, text.lower())
+
+
+def normalize_key(text):
+    return " ".join(text.upper().split())
+
+
+class TextIndex:
+    """Word-prefix search over text columns plus consent number prefixes."""
+
+    def __init__(self, df, columns=TEXT_COLUMNS, key=KEY_COLUMN):
+        self.n = len(df)
+        tokens = []
+        for column in columns:
+            if column in df.columns:
+                words = df[column].astype(object).fillna("").astype(str).str.lower().str.findall(TOKEN_PATTERN)
+                tokens.append(pd.Series(words.to_numpy(), index=np.arange(self.n)).explode().dropna())
+        postings = pd.concat(tokens) if tokens else pd.Series([], dtype=object)
+        postings = (
+            pd.DataFrame({'token': postings.to_numpy(dtype=str), 'row': postings.index.to_numpy(dtype='int64')})
+            .drop_duplicates()
+            .sort_values(['token', 'row'])
+        )
+        self._vocab, self._starts = np.unique(postings['token'].to_numpy(dtype=str), return_index=True)
+        self._starts = np.append(self._starts, len(postings))
+        self._rows = postings['row'].to_numpy()
+
+        keys = df[key].astype(object).fillna("").astype(str).map(normalize_key).to_numpy(dtype=str)
+        self._key_order = np.argsort(keys, kind='stable')
+        self._keys = keys[self._key_order]
+
+    def _prefix_range(self, sorted_values, prefix):
+        lo = np.searchsorted(sorted_values, prefix, side='left')
+        hi = np.searchsorted(sorted_values, prefix + _PREFIX_END, side='left')
+        return lo, hi
+
+    def word_rows(self, prefix):
+        """Sorted row positions with a word starting with ``prefix``."""
+        lo, hi = self._prefix_range(self._vocab, prefix.lower())
+        return np.unique(self._rows[self._starts[lo]:self._starts[hi]])
+
+    def consent_rows(self, prefix):
+        """Sorted row positions whose ConsentNo starts with ``prefix``."""
+        prefix = normalize_key(prefix)
+        if not prefix:
+            return np.zeros(0, dtype='int64')
+        lo, hi = self._prefix_range(self._keys, prefix)
+        return np.sort(self._key_order[lo:hi])
+
+    def search(self, query):
+        """Sorted row positions matching ``query``.
+
+        A row matches when every word of the query starts a word of its
+        Location or ActivityText, or when its ConsentNo starts with the
+        query. An empty query matches nothing.
+        """
+        words = tokenize(query)
+        if not words:
+            return np.zeros(0, dtype='int64')
+        rows = self.word_rows(words[0])
+        for word in words[1:]:
+            rows = np.intersect1d(rows, self.word_rows(word), assume_unique=True)
+        return np.union1d(rows, self.consent_rows(query))